@@ -10,7 +10,9 @@ import sys
 from pathlib import Path
 
 # Add src directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+_SRC_DIR = str(Path(__file__).parent.parent / 'src')
+if _SRC_DIR not in sys.path:
+    sys.path.insert(0, _SRC_DIR)
 
 from peer import HostPeer, JoinerPeer
 from game_data import MoveDatabase
@@ -31,8 +33,8 @@ def run_host_example():
     
     # Wait for joiner to connect
     print("Waiting for joiner to connect...")
-    timeout = time.time() + 30.0
-    while not host.connected and time.time() < timeout:
+    timeout = time.monotonic() + 30.0
+    while not host.connected and time.monotonic() < timeout:
         result = host.receive_message(timeout=0.5)
         if result:
             msg, addr = result
@@ -15,7 +15,8 @@ from collections import defaultdict
 
 # Add src directory to path
 src_path = Path(__file__).parent.parent / 'src'
-sys.path.insert(0, str(src_path))
+if str(src_path) not in sys.path:
+    sys.path.insert(0, str(src_path))
 
 try:
     from debug_logger import get_all_loggers
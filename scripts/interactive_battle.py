@@ -5,12 +5,16 @@ This script provides an interactive interface for running Pokémon battles
 between two peers with user-friendly prompts for IP addresses and ports.
 """
 
+import os
 import time
 import sys
+import errno
 import select
+import selectors
 import threading
-import queue
 import base64
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
 
 STICKER_BOOK = {
@@ -60,16 +64,60 @@ STICKER_BOOK = {
     '''
 }
 
+# Wire-ready sticker payloads, encoded once instead of on every /sticker
+_STICKER_PREFIX = "STICKER::"
+_STICKER_MSG = {
+    name: _STICKER_PREFIX + base64.b64encode(art.encode('utf-8')).decode('ascii')
+    for name, art in STICKER_BOOK.items()
+}
+_STICKER_NAMES = ', '.join(STICKER_BOOK)
+
+
+@lru_cache(maxsize=256)
+def _decode_sticker(b64_content):
+    """Decode a received sticker's base64 art; the same few stickers repeat, so results are cached."""
+    return base64.b64decode(b64_content).decode('utf-8')
+
 # Add src directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+_SRC_DIR = str(Path(__file__).parent.parent / 'src')
+if _SRC_DIR not in sys.path:
+    sys.path.insert(0, _SRC_DIR)
 
 from peer import HostPeer, JoinerPeer, SpectatorPeer
 from game_data import MoveDatabase, PokemonDataLoader
+from messages import AttackAnnounce, RematchRequest
 
-# Global chat input queue and thread control
-_chat_input_queue = queue.Queue()
-_chat_thread_active = False
+# Global chat input thread control
+_chat_stop = threading.Event()  # Set to ask the chat input thread to exit
 _chat_thread = None
+_chat_line_buffer = []  # Partial line typed so far (Windows console only)
+_chat_input_bytes = bytearray()  # Partial line read from stdin so far (POSIX)
+
+# Game data is loaded once per process (see _loader / _move_db)
+_LOADER = None
+_MOVE_DB = None
+_move_menus = {}  # Pokémon name -> (display_moves, menu_text)
+
+# Accepted answers for Y/N prompts
+_YES_NO = {'y': True, 'yes': True, 'n': False, 'no': False}
+_NAV_STEPS = {'N': 1, 'NEXT': 1, 'P': -1, 'PREVIOUS': -1, 'PREV': -1}
+_NAV_QUIT = frozenset(('Q', 'QUIT', 'EXIT'))
+
+# errno/winerror codes for "address already in use" (10048 is WSAEADDRINUSE)
+_ADDRINUSE = frozenset((errno.EADDRINUSE, 10048))
+
+# Banners, built once at import time
+_BAR = "=" * 60
+_BATTLE_START_BANNER = f"\n{_BAR}\n  BATTLE START!\n{_BAR}\n[SYSTEM] Chat is disabled during battle.\n"
+_BATTLE_COMPLETE_HEADER = f"\n{_BAR}\n  BATTLE COMPLETE!\n"
+_YOUR_TURN_HEADER = f"\n{_BAR}\n  YOUR TURN!\n{_BAR}"
+_STICKER_RULE = "-" * 20
+_BATTLE_PREFIX = b"[BATTLE] "
+_PRE_BATTLE_HEADER = (
+    f"\n{_BAR}\n  PRE-BATTLE CHAT SESSION\n{_BAR}\n"
+    "Both players must agree to start chatting.\n"
+    f"Type '/endchat' at any time to end the chat session.\n{_BAR}"
+)
 
 
 def get_user_input(prompt, default=None, validator_func=None):
@@ -114,36 +162,78 @@ def get_validated_input(prompt, validator_func, error_message="Invalid input. Pl
 
 
 def validate_integer(input_str, min_val=None, max_val=None):
-    try:
+    # Plain ASCII digits (the usual menu answer) can't make int() raise
+    if input_str.isascii() and input_str.isdigit():
         value = int(input_str)
-        if min_val is not None and value < min_val:
-            return False, f"Value must be at least {min_val}"
-        if max_val is not None and value > max_val:
-            return False, f"Value must be at most {max_val}"
-        return True, value
-    except ValueError:
-        return False, "Please enter a valid integer"
-
-
-def validate_choice(input_str, valid_choices, case_sensitive=False):
-    if not case_sensitive:
-        input_str = input_str.upper()
-        valid_choices = [c.upper() if isinstance(c, str) else c for c in valid_choices]
-    
-    if input_str in valid_choices:
-        return True, input_str
-    return False, f"Please enter one of: {', '.join(str(c) for c in valid_choices)}"
+    else:
+        try:
+            value = int(input_str)
+        except ValueError:
+            return False, "Please enter a valid integer"
+    if min_val is not None and value < min_val:
+        return False, f"Value must be at least {min_val}"
+    if max_val is not None and value > max_val:
+        return False, f"Value must be at most {max_val}"
+    return True, value
+
+
+@lru_cache(maxsize=64)
+def _int_validator(min_val, max_val):
+    """Return a shared validator accepting integers in [min_val, max_val]."""
+    return lambda input_str: validate_integer(input_str, min_val=min_val, max_val=max_val)
 
 
 def validate_port(input_str):
     return validate_integer(input_str, min_val=1, max_val=65535)
 
 
-def validate_yes_no(input_str):
-    upper_input = input_str.upper()
-    if upper_input in ['Y', 'YES', 'N', 'NO']:
-        return True, upper_input in ['Y', 'YES']
-    return False, "Please enter Y or N"
+def ask_yes_no(prompt, default=None):
+    """Ask a Y/N question until answered. Empty input returns default if one is given."""
+    if default is None:
+        prompt_text = f"{prompt}: "
+    else:
+        prompt_text = f"{prompt} (default: {'Y' if default else 'N'}): "
+
+    while True:
+        answer = input(prompt_text).strip().lower()
+        if not answer and default is not None:
+            return default
+        decision = _YES_NO.get(answer)
+        if decision is not None:
+            return decision
+        print("✗ Please enter Y or N")
+
+
+def _emit(*lines):
+    """Write a block of lines with one stdout write instead of a print() per line."""
+    sys.stdout.write("\n".join(lines) + "\n")
+
+
+def _write_stdout(data):
+    """
+    Write pre-encoded bytes straight to fd 1, skipping print()'s text encoding.
+    Anything already buffered in sys.stdout is flushed first so output stays in
+    order. Falls back to sys.stdout when it is not the real stdout (e.g. IDLE).
+    """
+    try:
+        raw = sys.stdout.fileno() == 1
+    except (AttributeError, OSError, ValueError):
+        raw = False
+
+    if raw:
+        sys.stdout.flush()
+        # os.write may write only part of a long buffer (e.g. sticker art)
+        view = memoryview(data)
+        while view:
+            view = view[os.write(1, view):]
+    else:
+        sys.stdout.write(data.decode("utf-8", "replace"))
+
+
+def _is_address_in_use(error):
+    """Check whether an OSError means the port is already bound."""
+    return (getattr(error, 'errno', None) in _ADDRINUSE or
+            getattr(error, 'winerror', None) in _ADDRINUSE)
 
 
 def validate_non_empty(input_str):
@@ -152,53 +242,81 @@ def validate_non_empty(input_str):
     return False, "Input cannot be empty"
 
 
+def _loader():
+    """Return the shared PokemonDataLoader, loading the CSV on first use."""
+    global _LOADER
+    if _LOADER is None:
+        _LOADER = PokemonDataLoader()
+    return _LOADER
+
+
+def _move_db():
+    """Return the shared MoveDatabase, building it on first use."""
+    global _MOVE_DB
+    if _MOVE_DB is None:
+        _MOVE_DB = MoveDatabase()
+    return _MOVE_DB
+
+
+@lru_cache(maxsize=None)
+def _pokemon_pages(items_per_page):
+    """Render every page of the Pokémon list, with its navigation block, once per process."""
+    names = _loader().get_all_pokemon_names()
+    total_pokemon = len(names)
+    total_pages = (total_pokemon + items_per_page - 1) // items_per_page
+    pages = []
+    for page in range(total_pages):
+        start_idx = page * items_per_page
+        lines = [f"\n=== Available Pokémon (Page {page + 1} of {total_pages}) ==="]
+        lines.extend(f"{i}. {name}" for i, name in
+                     enumerate(names[start_idx:start_idx + items_per_page], start=start_idx + 1))
+        lines.append("\nNavigation:")
+        if page > 0:
+            lines.append("  P or Previous - Go to previous page")
+        if page < total_pages - 1:
+            lines.append("  N or Next - Go to next page")
+        lines.append(f"  # - Select Pokémon by index (1-{total_pokemon})")
+        lines.append("  Q or Quit - Exit list view")
+        lines.append("  (commands can be chained, e.g. 'n n 42')")
+        pages.append("\n".join(lines) + "\n")
+    return tuple(pages)
+
+
 def select_pokemon():
     """Allow user to select a Pokémon with pagination support."""
-    loader = PokemonDataLoader()
+    loader = _loader()
     names = loader.get_all_pokemon_names()
     total_pokemon = len(names)
     items_per_page = 30
 
     print("\n=== Select Your Pokémon ===")
     print("Enter a Pokémon name, or type 'list' to see available Pokémon")
-    sys.stdout.flush() 
+    sys.stdout.flush()
 
     while True:
         pokemon_input = input("Pokémon name: ").strip()
 
         if pokemon_input.lower() == 'list':
+            pages = _pokemon_pages(items_per_page)
             current_page = 0
-            total_pages = (total_pokemon + items_per_page - 1) // items_per_page
+            total_pages = len(pages)
             
             while True:
-                start_idx = current_page * items_per_page
-                end_idx = min(start_idx + items_per_page, total_pokemon)
-                page_names = names[start_idx:end_idx]
-                
-                print(f"\n=== Available Pokémon (Page {current_page + 1} of {total_pages}) ===")
-                for i, name in enumerate(page_names, start=start_idx + 1):
-                    print(f"{i}. {name}")
+                sys.stdout.write(pages[current_page])
                 
-                nav_options = []
-                if current_page > 0:
-                    nav_options.append("P or Previous - Go to previous page")
-                if current_page < total_pages - 1:
-                    nav_options.append("N or Next - Go to next page")
-                nav_options.append(f"# - Select Pokémon by index (1-{total_pokemon})")
-                nav_options.append("Q or Quit - Exit list view")
-                
-                print(f"\nNavigation:")
-                for opt in nav_options:
-                    print(f"  {opt}")
-                
-                nav_input = input("\nEnter command: ").strip()
+                # Leading N/P words are applied in one go, so a line like
+                # "n n 42" pages ahead and picks from a single prompt
+                words = input("\nEnter command: ").split()
+                moved = False
+                while words and words[0].upper() in _NAV_STEPS:
+                    current_page = (current_page + _NAV_STEPS[words.pop(0).upper()]) % total_pages
+                    moved = True
+                if moved and not words:
+                    continue
+                nav_input = " ".join(words)
                 nav_upper = nav_input.upper()
                 
-                if nav_upper in ['N', 'NEXT']:
-                    current_page = (current_page + 1) % total_pages
-                elif nav_upper in ['P', 'PREVIOUS', 'PREV']:
-                    current_page = (current_page - 1) % total_pages
-                elif nav_upper in ['Q', 'QUIT', 'EXIT']:
+                if nav_upper in _NAV_QUIT:
                     print("Exiting list view.")
                     break
                 elif nav_input.isdigit():
@@ -228,46 +346,56 @@ def select_pokemon():
             print(f"Selected: {pokemon.name} (HP: {pokemon.hp}, Type: {pokemon.type1}/{pokemon.type2 or 'None'})")
             return pokemon.name
         else:
-            print(f"✗ Pokémon '{pokemon_input}' not found. Try again or type 'list'.")
-            print() 
-            sys.stdout.flush() 
+            print(f"✗ Pokémon '{pokemon_input}' not found. Try again or type 'list'.\n")
 
 
-def select_move(pokemon_name=None):
-    """Allow user to select a move."""
-    stop_chat_input_thread()
-    
-    move_db = MoveDatabase()
-    loader = PokemonDataLoader()
+def _move_menu(pokemon):
+    """
+    Get (display_moves, menu_text) for a Pokémon's move prompt.
 
-    pokemon = None
-    if pokemon_name:
-        pokemon = loader.get_pokemon(pokemon_name)
-    
-    available_moves = []
-    if pokemon:
-        type1_moves = move_db.get_moves_by_type(pokemon.type1)
-        available_moves.extend(type1_moves)
-        
+    A Pokémon's move list never changes, so the menu is built once per name
+    and reused on every later turn and rematch.
+    """
+    menu = _move_menus.get(pokemon.name)
+    if menu is None:
+        move_db = _move_db()
+        # Keyed by name so type2 moves merge in order without duplicates
+        merged = {move.name: move for move in move_db.get_moves_by_type(pokemon.type1)}
         if pokemon.type2:
-            type2_moves = move_db.get_moves_by_type(pokemon.type2)
-            for move in type2_moves:
-                if move not in available_moves:
-                    available_moves.append(move)
-        
-        if not available_moves:
-            available_moves = [move_db.get_move(name) for name in move_db.get_all_move_names()]
-            available_moves = [m for m in available_moves if m is not None]
+            for move in move_db.get_moves_by_type(pokemon.type2):
+                merged.setdefault(move.name, move)
+        available_moves = list(merged.values()) or move_db.get_all_moves()
+
+        display_moves = available_moves[:20]
+        lines = [
+            f"\nYour turn! Select a move for {pokemon.name}:",
+            f"Available moves (matching {pokemon.type1}" + (f"/{pokemon.type2}" if pokemon.type2 else "") + " types):",
+        ]
+        lines.extend(f"{i}. {move.name} (Power: {move.power}, Type: {move.move_type})"
+                     for i, move in enumerate(display_moves, 1))
+        if len(available_moves) > 20:
+            lines.append(f"... and {len(available_moves) - 20} more moves")
+
+        menu = (display_moves, "\n".join(lines) + "\n")
+        _move_menus[pokemon.name] = menu
+    return menu
+
+
+def select_move(pokemon=None):
+    """Allow user to select a move for a Pokémon. Returns the chosen Move, or None if it is unknown."""
+    stop_chat_input_thread()
     
-    if not available_moves:
-        print("\nYour turn! Select a move:")
-        print("1. Quick Attack (Electric moves)")
-        print("2. Strong Attack (Fire moves)")
-        print("3. Special Attack (Water moves)")
+    move_db = _move_db()
+
+    if not pokemon:
+        _emit("\nYour turn! Select a move:",
+              "1. Quick Attack (Electric moves)",
+              "2. Strong Attack (Fire moves)",
+              "3. Special Attack (Water moves)")
 
         choice = get_validated_input(
             "Enter choice (1-3)",
-            lambda x: validate_integer(x, min_val=1, max_val=3),
+            _int_validator(1, 3),
             "Please enter a number between 1 and 3"
         )
 
@@ -278,76 +406,124 @@ def select_move(pokemon_name=None):
         elif choice == 3:
             moves = ['Water Gun', 'Bubble Beam', 'Hydro Pump']
 
+        lines = []
         for i, move_name in enumerate(moves, 1):
             move = move_db.get_move(move_name)
             if move:
-                print(f"{i}. {move_name} (Power: {move.power}, Type: {move.move_type})")
+                lines.append(f"{i}. {move_name} (Power: {move.power}, Type: {move.move_type})")
+        if lines:
+            _emit(*lines)
 
         move_choice = get_validated_input(
             f"Select move (1-{len(moves)})",
-            lambda x: validate_integer(x, min_val=1, max_val=len(moves)),
+            _int_validator(1, len(moves)),
             f"Please enter a number between 1 and {len(moves)}"
         )
         
-        result = moves[move_choice - 1]
-        return result
+        return move_db.get_move(moves[move_choice - 1])
     else:
-        print(f"\nYour turn! Select a move for {pokemon.name}:")
-        print(f"Available moves (matching {pokemon.type1}" + (f"/{pokemon.type2}" if pokemon.type2 else "") + " types):")
-        
-        display_moves = available_moves[:20]
-        for i, move in enumerate(display_moves, 1):
-            print(f"{i}. {move.name} (Power: {move.power}, Type: {move.move_type})")
-        
-        if len(available_moves) > 20:
-            print(f"... and {len(available_moves) - 20} more moves")
+        display_moves, menu_text = _move_menu(pokemon)
+        sys.stdout.write(menu_text)
         
         move_choice = get_validated_input(
             f"Select move (1-{len(display_moves)})",
-            lambda x: validate_integer(x, min_val=1, max_val=len(display_moves)),
+            _int_validator(1, len(display_moves)),
             f"Please enter a number between 1 and {len(display_moves)}"
         )
         
-        return display_moves[move_choice - 1].name
+        return display_moves[move_choice - 1]
 
 
 def clear_input_stream():
     """Clear any pending input from stdin buffer."""
-    try:
-        import msvcrt
-        while msvcrt.kbhit():
-            try:
-                msvcrt.getch()
-            except:
-                break
+    if os.name == 'nt':
         try:
-            sys.stdin.flush()
-        except:
+            import msvcrt
+            while msvcrt.kbhit():
+                msvcrt.getwch()
+        except Exception:
             pass
+        return
+
+    _chat_input_bytes.clear()
+    try:
+        fd = sys.stdin.fileno()
+    except (AttributeError, OSError, ValueError):
+        return
+
+    # One tcflush() empties the terminal's input queue
+    try:
+        import termios
+        termios.tcflush(fd, termios.TCIFLUSH)
+        return
     except ImportError:
-        try:
-            import termios
-            termios.tcflush(sys.stdin, termios.TCIFLUSH)
-        except (ImportError, AttributeError):
-            try:
-                import select
-                while True:
-                    ready, _, _ = select.select([sys.stdin], [], [], 0)
-                    if not ready:
-                        break
-                    try:
-                        char = sys.stdin.read(1)
-                        if not char:
-                            break
-                    except:
-                        break
-            except:
-                try:
-                    sys.stdin.flush()
-                except:
-                    pass
-    except Exception:
         pass
+    except termios.error:
+        pass
+
+    # Not a terminal (e.g. a pipe): drain whatever is readable in blocks
+    try:
+        while select.select([fd], [], [], 0)[0]:
+            if not os.read(fd, 4096):
+                break
+    except OSError:
+        pass
+
+
+def _read_chat_line(timeout=0.1):
+    """
+    Wait up to timeout seconds for a line of input.
+
+    Returns the line, or None if no complete line arrived in time, so the chat
+    thread can notice it was stopped. Raises EOFError when stdin is closed.
+    """
+    if os.name == 'nt':
+        import msvcrt
+        deadline = time.monotonic() + timeout
+        while True:
+            while msvcrt.kbhit():
+                ch = msvcrt.getwche()
+                if ch in '\x00\xe0':
+                    # Arrow and function keys come as a prefix plus a scan code
+                    msvcrt.getwch()
+                    continue
+                if ch in '\r\n':
+                    msvcrt.putwch('\n')
+                    line = ''.join(_chat_line_buffer)
+                    _chat_line_buffer.clear()
+                    return line
+                if ch == '\x03':
+                    raise KeyboardInterrupt
+                if ch == '\b':
+                    if _chat_line_buffer:
+                        _chat_line_buffer.pop()
+                        msvcrt.putwch(' ')
+                        msvcrt.putwch('\b')
+                else:
+                    _chat_line_buffer.append(ch)
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(0.01)
+
+    # Read the fd directly: sys.stdin.readline() would pull any further lines
+    # into Python's buffer, where select() can no longer see them. Taking one
+    # byte at a time leaves everything after the newline in the fd, so the
+    # next input() prompt still gets it once the chat thread stops.
+    fd = sys.stdin.fileno()
+    deadline = time.monotonic() + timeout
+    while True:
+        remaining = max(0.0, deadline - time.monotonic())
+        if not select.select([fd], [], [], remaining)[0]:
+            return None
+        ch = os.read(fd, 1)
+        if ch == b'\n' or (not ch and _chat_input_bytes):
+            # A last line without a newline is returned; EOF is raised next call
+            line = bytes(_chat_input_bytes)
+            _chat_input_bytes.clear()
+            return line.decode(sys.stdin.encoding or 'utf-8', 'replace').rstrip('\r')
+        if not ch:
+            raise EOFError
+        _chat_input_bytes.extend(ch)
 
 
 def _chat_input_thread(peer, player_name):
@@ -355,22 +531,28 @@ def _chat_input_thread(peer, player_name):
     Background thread that reads input. 
     Supports: /chat <msg>, /sticker <name>, /endchat
     """
-    global _chat_thread_active
-    
     print(f"\n[SYSTEM] Chat active. Commands: /chat <msg>, /sticker <name>, /endchat")
-    print(f"[SYSTEM] Stickers: {', '.join(STICKER_BOOK.keys())}")
+    print(f"[SYSTEM] Stickers: {_STICKER_NAMES}")
 
-    while _chat_thread_active:
+    # The peer doesn't change while the thread runs, so resolve these once
+    has_chat_flag = hasattr(peer, 'chat_enabled')
+    send_notification = getattr(peer, 'send_chat_state_notification', None)
+    send_chat = peer.send_chat_message
+
+    while not _chat_stop.is_set():
         try:
-            user_input = input().strip()
+            user_input = _read_chat_line()
+            if user_input is None:
+                continue
+            user_input = user_input.strip()
             
             if user_input.lower() == '/endchat':
-                if hasattr(peer, 'chat_enabled') and peer.chat_enabled:
+                if has_chat_flag and peer.chat_enabled:
                     peer.chat_enabled = False
-                    if hasattr(peer, 'send_chat_state_notification'):
-                        peer.send_chat_state_notification(player_name, "ended chat session")
+                    if send_notification:
+                        send_notification(player_name, "ended chat session")
                     print(f"\n[SYSTEM] You ended the chat session.")
-                    _chat_thread_active = False
+                    _chat_stop.set()
                     break 
                 else:
                     print(f"\n[SYSTEM] Chat is already disabled.")
@@ -378,38 +560,30 @@ def _chat_input_thread(peer, player_name):
             
             if user_input.startswith('/sticker '):
                 sticker_name = user_input[9:].strip().lower()
-                if sticker_name in STICKER_BOOK:
-                    ascii_art = STICKER_BOOK[sticker_name]
-                    b64_sticker = base64.b64encode(ascii_art.encode('utf-8')).decode('utf-8')
-                    final_msg = f"STICKER::{b64_sticker}"
-                    
+                final_msg = _STICKER_MSG.get(sticker_name)
+                if final_msg:
                     try:
-                        peer.send_chat_message(player_name, final_msg)
-                        print(f"[You sent sticker '{sticker_name}':]")
-                        print(ascii_art)
+                        send_chat(player_name, final_msg)
+                        sys.stdout.write(f"[You sent sticker '{sticker_name}':]\n{STICKER_BOOK[sticker_name]}\n")
                     except Exception as e:
                         print(f"Error sending sticker: {e}")
                 else:
-                    print(f"[SYSTEM] Unknown sticker. Available: {', '.join(STICKER_BOOK.keys())}")
+                    print(f"[SYSTEM] Unknown sticker. Available: {_STICKER_NAMES}")
                 continue
 
-            if user_input.startswith('/chat '):
-                message = user_input[6:].strip()
-                if message:
-                    try:
-                        peer.send_chat_message(player_name, message)
-                        print(f"[You]: {message}")
-                    except Exception as e:
-                        print(f"Error sending chat: {e}")
-            
-            elif user_input.startswith('/chat'):
+            if user_input.startswith('/chat'):
+                # strip() also drops the optional space after '/chat'
                 message = user_input[5:].strip()
-                if message:
-                    try:
-                        peer.send_chat_message(player_name, message)
-                        print(f"[You]: {message}")
-                    except Exception as e:
-                        print(f"Error sending chat: {e}")
+                if not message:
+                    continue
+                if has_chat_flag and not peer.chat_enabled:
+                    print(f"[SYSTEM] Chat is disabled.")
+                    continue
+                try:
+                    send_chat(player_name, message)
+                    sys.stdout.write(f"[You]: {message}\n")
+                except Exception as e:
+                    print(f"Error sending chat: {e}")
 
         except (EOFError, KeyboardInterrupt):
             break
@@ -419,31 +593,25 @@ def _chat_input_thread(peer, player_name):
 
 def start_chat_input_thread(peer, player_name):
     """Start the background chat input thread."""
-    global _chat_thread_active, _chat_thread
+    global _chat_thread
     
-    if _chat_thread_active:
-        return 
+    if _chat_thread and _chat_thread.is_alive():
+        if not _chat_stop.is_set():
+            return
+        # Two readers would split stdin between them, so let a thread that
+        # is already stopping exit before the event is reused
+        _chat_thread.join()
     
-    _chat_thread_active = True
+    _chat_stop.clear()
     _chat_thread = threading.Thread(target=_chat_input_thread, args=(peer, player_name), daemon=True)
     _chat_thread.start()
 
 
 def run_pre_battle_chat(peer, player_name, opponent_name):
     """Run pre-battle chat session with voting."""
-    print("\n" + "="*60)
-    print("  PRE-BATTLE CHAT SESSION")
-    print("="*60)
-    print("Both players must agree to start chatting.")
-    print("Type '/endchat' at any time to end the chat session.")
-    print("="*60)
+    print(_PRE_BATTLE_HEADER)
     
-    response = get_validated_input(
-        "\nDo you want to enable chat? (Y/N)",
-        validate_yes_no,
-        "Please enter Y or N",
-        default=False
-    )
+    response = ask_yes_no("\nDo you want to enable chat? (Y/N)", default=False)
     if response:
         peer.chat_enabled = True
         print(f"\n[SYSTEM] You enabled chat. Chat is now active!")
@@ -453,13 +621,7 @@ def run_pre_battle_chat(peer, player_name, opponent_name):
         start_chat_input_thread(peer, player_name)
         
         print(f"\n[SYSTEM] Chat session active. Waiting for battle to start...")
-        while peer.chat_enabled:
-            result = peer.receive_message(timeout=0.5)
-            if result:
-                msg, addr = result
-                peer.handle_message(msg, addr)
-            peer.process_reliability()
-            time.sleep(0.1)
+        _pump_while(peer, lambda: peer.chat_enabled, poll=0.5)
         
         if not peer.chat_enabled:
             print(f"\n[SYSTEM] Chat session ended.")
@@ -469,238 +631,273 @@ def run_pre_battle_chat(peer, player_name, opponent_name):
 
 
 def stop_chat_input_thread():
-    """Stop the background chat input thread."""
-    global _chat_thread_active, _chat_thread
-    _chat_thread_active = False
-    if _chat_thread and _chat_thread.is_alive():
-        try:
-            import ctypes
-            res = ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_long(_chat_thread.ident), ctypes.py_object(KeyboardInterrupt))
-            if res > 1:
-                ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_long(_chat_thread.ident), 0)
-        except Exception:
-            pass
-        _chat_thread.join(timeout=0.5)
+    """
+    Stop the background chat input thread.
+
+    The thread waits on stdin in short slices (see _read_chat_line), so it
+    sees the stop event and exits on its own within one slice. A thread
+    still running after the join is kept, so start_chat_input_thread waits
+    for it instead of starting a second reader.
+    """
+    global _chat_thread
+    _chat_stop.set()
+    if _chat_thread is None:
+        return
+    _chat_thread.join(timeout=0.5)
+    if not _chat_thread.is_alive():
         _chat_thread = None
 
 
-def check_chat_input(prompt="Type 'chat' to send a message, or press Enter to continue: "):
-    """Check if user wants to send a chat message (non-blocking check)."""
+def _pump_messages(peer, sel, timeout, max_messages=32):
+    """
+    Wait up to timeout seconds (None for no limit) for the peer's socket to become readable,
+    handle up to max_messages queued datagrams, then run the reliability
+    layer if a retransmission or ACK sweep is due.
+
+    The wait is cut short when a retransmission is due, so the caller never
+    has to poll just to keep ACK timers moving.
+    """
+    # Scan the pending table once; anything sent during the wait times out later
+    next_timer = peer.reliability.next_timer_in()
+    if next_timer is None:
+        retransmit_at = float('inf')
+    else:
+        retransmit_at = time.monotonic() + next_timer
+        timeout = next_timer if timeout is None else min(timeout, next_timer)
+    if sel.select(timeout):
+        handle = peer.handle_message
+        for message, address in peer.receive_pending(max_messages):
+            handle(message, address)
+    if peer.reliability.is_due(retransmit_at):
+        peer.process_reliability()
+
+
+def _pump_while(peer, keep_going, timeout=None, poll=None, max_messages=32):
+    """
+    Pump the peer's socket while keep_going() holds, for at most timeout
+    seconds (None for no limit).
+
+    poll bounds each selector wait; pass it when keep_going() depends on
+    state another thread can change, such as the chat thread's /endchat.
+    Pass max_messages=1 to stop right after the message keep_going() is
+    waiting for, leaving anything behind it queued.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    with selectors.DefaultSelector() as sel:
+        sel.register(peer.socket, selectors.EVENT_READ)
+        while keep_going():
+            wait = poll
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                wait = remaining if wait is None else min(wait, remaining)
+            _pump_messages(peer, sel, wait, max_messages)
+
+
+def _both_pokemon_ready(peer):
+    """True once both sides of the peer's battle have a Pokémon."""
+    bs = peer.battle_state
+    return bool(bs and bs.my_pokemon and bs.opponent_pokemon)
+
+
+@contextmanager
+def _pump_in_background(peer, until=None):
+    """
+    Keep servicing the peer's socket on a helper thread while the caller
+    blocks on a prompt, so ACKs, retransmissions and the opponent's messages
+    are not held up by the user.
+
+    If until is given the helper handles one datagram at a time and stops
+    as soon as until() holds, leaving whatever follows queued for the main
+    thread.
+
+    The main thread must not touch the peer inside the block; the helper is
+    joined on exit, handing the peer back before the caller resumes. The
+    chat input thread may still send through the peer meanwhile, which is
+    why ReliabilityLayer guards its sequence and pending state with a lock.
+    """
+    stop = threading.Event()
+    max_messages = 32 if until is None else 1
+
+    def pump():
+        with selectors.DefaultSelector() as sel:
+            sel.register(peer.socket, selectors.EVENT_READ)
+            while not stop.is_set() and not (until and until()):
+                try:
+                    _pump_messages(peer, sel, 0.2, max_messages)
+                except Exception as e:
+                    print(f"Error while servicing the connection: {e}")
+
+    thread = threading.Thread(target=pump, daemon=True)
+    thread.start()
     try:
-        user_input = input(prompt).strip()
-        if user_input.lower() == 'chat' or user_input.startswith('/'):
-            if user_input.startswith('/'):
-                return user_input[1:].strip()
-            else:
-                chat_msg = input("Enter your chat message: ").strip()
-                return chat_msg if chat_msg else None
-        return None
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def _await_rematch_decisions(spectator, sel, timeout=60.0):
+    """
+    Pump the spectator's socket until both players have decided on a
+    rematch or the timeout expires.
+
+    Reuses the caller's selector. Each wait is capped at 0.5 s because the
+    spectator's chat thread can queue messages needing retransmission while
+    this thread is blocked. Returns (host_wants, joiner_wants, timed_out).
+    """
+    deadline = time.monotonic() + timeout
+    while spectator.host_rematch is None or spectator.joiner_rematch is None:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return spectator.host_rematch, spectator.joiner_rematch, True
+        try:
+            _pump_messages(spectator, sel, min(remaining, 0.5))
+        except Exception as e:
+            print(f"Error during rematch wait: {e}")
+    return spectator.host_rematch, spectator.joiner_rematch, False
+
+
+def _chat_session_tail(peer):
+    """Keep an enabled chat session alive after the last battle, until /endchat."""
+    if not peer.chat_enabled:
+        print("Thanks for playing!")
+        return
+
+    print("Chat session is active. Type '/endchat' to end the session and disconnect.")
+    try:
+        _pump_while(peer, lambda: peer.chat_enabled, poll=0.5)
     except (EOFError, KeyboardInterrupt):
-        return None
+        pass
+    print("\nChat session ended. Thanks for playing!")
+
 
 def run_host_battle_loop(host):
-    """Run a single battle loop for the host. Can be called multiple times for rematches."""
-    if not hasattr(host, '_battle_count') or host._battle_count == 0:
+    """Run the host's battle loop, starting a new battle for each accepted rematch."""
+    # Pre-battle chat only happens before the first battle of a session
+    if not getattr(host, '_battle_count', 0):
         run_pre_battle_chat(host, "Host", "Joiner")
 
         stop_chat_input_thread()
-        time.sleep(0.2)
         clear_input_stream()
         print("\n" * 2)
 
         host._battle_count = 0
 
-    host._battle_count += 1
-    host.chat_enabled = False
+    while True:
+        host._battle_count += 1
+        host.chat_enabled = False
     
-    stop_chat_input_thread()
-    clear_input_stream()
+        stop_chat_input_thread()
+        clear_input_stream()
     
-    pokemon_name = select_pokemon()
+        pokemon_name = select_pokemon()
 
-    opponent_already_selected = (host.battle_state and 
-                                  host.battle_state.opponent_pokemon is not None and
-                                  host.battle_state.state.value != "GAME_OVER")
+        opponent_already_selected = (host.battle_state and 
+                                      host.battle_state.opponent_pokemon is not None and
+                                      host.battle_state.state.value != "GAME_OVER")
     
-    preserved_opponent = None
-    if opponent_already_selected:
-        preserved_opponent = host.battle_state.opponent_pokemon
+        preserved_opponent = None
+        if opponent_already_selected:
+            preserved_opponent = host.battle_state.opponent_pokemon
 
-    print(f"\nStarting battle with {pokemon_name}...")
-    host.start_battle(pokemon_name)
+        print(f"\nStarting battle with {pokemon_name}...")
+        host.start_battle(pokemon_name)
     
-    if preserved_opponent and host.battle_state:
-        from battle import BattlePokemon
-        fresh_opponent = BattlePokemon(
-            preserved_opponent.pokemon,
-            preserved_opponent.special_attack_uses,
-            preserved_opponent.special_defense_uses
-        )
-        host.battle_state.opponent_pokemon = fresh_opponent
-        host.battle_state.advance_to_waiting()
-
-    if not (host.battle_state and 
-            host.battle_state.my_pokemon and 
-            host.battle_state.opponent_pokemon):
-        print("Waiting for opponent to select Pokémon...")
-        timeout = time.time() + 60.0
-        while time.time() < timeout:
-            if (host.battle_state and 
-                host.battle_state.my_pokemon and 
-                host.battle_state.opponent_pokemon):
-                break
-            
-            result = host.receive_message(timeout=0.5)
-            if result:
-                msg, addr = result
-                host.handle_message(msg, addr)
-            host.process_reliability()
-            time.sleep(0.1)
+        if preserved_opponent and host.battle_state:
+            preserved_opponent.restore_hp()
+            host.battle_state.opponent_pokemon = preserved_opponent
+            host.battle_state.advance_to_waiting()
+
+        if not _both_pokemon_ready(host):
+            print("Waiting for opponent to select Pokémon...")
+            _pump_while(host, lambda: not _both_pokemon_ready(host), timeout=60.0)
         
-        if not (host.battle_state and 
-                host.battle_state.my_pokemon and 
-                host.battle_state.opponent_pokemon):
-            print("Timeout waiting for opponent's Pokémon")
-            return False
-
-    print("\n" + "="*60)
-    print("  BATTLE START!")
-    print("="*60)
-    print("[SYSTEM] Chat is disabled during battle.")
-
-    move_db = MoveDatabase()
-    battle_active = True
-    
-    while battle_active and not host.battle_state.is_game_over():
-        result = host.receive_message(timeout=0.1)
-        if result:
-            msg, addr = result
-            host.handle_message(msg, addr)
-
-        host.process_reliability()
-
-        if host.battle_state and host.battle_state.is_my_turn():
-            status = host.battle_state.get_battle_status()
-            print(f"\n{'='*60}")
-            print(f"  YOUR TURN!")
-            print(f"{'='*60}")
-            print(f"{status}")
-
-            move_name = select_move(host.my_pokemon.pokemon.name if host.my_pokemon else None)
-            move = move_db.get_move(move_name)
+            if not _both_pokemon_ready(host):
+                print("Timeout waiting for opponent's Pokémon")
+                return False
+
+        sys.stdout.write(_BATTLE_START_BANNER)
 
-            if move and host.battle_state:
-                from messages import AttackAnnounce
-                announce = AttackAnnounce(
-                    move.name,
-                    host.reliability.get_next_sequence_number()
-                )
-                host.send_message(announce)
-                print(f"Used {move.name}!")
-                host.battle_state.mark_my_turn_taken(move)
-        time.sleep(0.1)
-
-    if host.battle_state.is_game_over():
-        winner = host.battle_state.get_winner()
-        winner_pokemon = winner
-        loser = host.battle_state.opponent_pokemon.pokemon.name if winner == host.my_pokemon.pokemon.name else host.my_pokemon.pokemon.name
+        battle_active = True
+        bs = host.battle_state
+        next_seq = host.reliability.get_next_sequence_number
+        is_game_over = bs.is_game_over
+        is_my_turn = bs.is_my_turn
+    
+        with selectors.DefaultSelector() as sel:
+            sel.register(host.socket, selectors.EVENT_READ)
+            while battle_active and not is_game_over():
+                # Only drain what is already queued when it is our move
+                _pump_messages(host, sel, 0 if is_my_turn() else 0.5)
+
+                if is_my_turn():
+                    status = bs.get_battle_status()
+                    _emit(_YOUR_TURN_HEADER, status)
+
+                    with _pump_in_background(host):
+                        move = select_move(host.my_pokemon.pokemon if host.my_pokemon else None)
+
+                    if move:
+                        announce = AttackAnnounce(move.name, next_seq())
+                        host.send_message(announce)
+                        print(f"Used {move.name}!")
+                        bs.mark_my_turn_taken(move)
+
+        if host.battle_state.is_game_over():
+            winner = host.battle_state.get_winner()
+            my_name = host.my_pokemon.pokemon.name
+            opp_name = host.battle_state.opponent_pokemon.pokemon.name
+            loser = opp_name if winner == my_name else my_name
         
-        print(f"\n" + "="*60)
-        print(f"  BATTLE COMPLETE!")
-        print(f"  Winner: {winner_pokemon}")
-        print(f"  Loser: {loser}")
-        print("="*60)
+            print(f"{_BATTLE_COMPLETE_HEADER}  Winner: {winner}\n  Loser: {loser}\n{_BAR}")
         
-        stop_chat_input_thread()
+            stop_chat_input_thread()
         
-        wants_rematch = get_validated_input(
-            "\nStart a new battle? (Y/N)",
-            validate_yes_no,
-            "Please enter Y or N"
-        )
+            with _pump_in_background(host, until=host.rematch_event.is_set):
+                wants_rematch = ask_yes_no("\nStart a new battle? (Y/N)")
         
-        from messages import RematchRequest
-        rematch_msg = RematchRequest(wants_rematch, host.reliability.get_next_sequence_number())
-        host.send_message(rematch_msg)
-        host._broadcast_to_spectators(rematch_msg)
-        print(f"\nWaiting for opponent's response...")
+            rematch_msg = RematchRequest(wants_rematch, host.reliability.get_next_sequence_number())
+            host.send_to_all(rematch_msg)
+            print(f"\nWaiting for opponent's response...")
         
-        print(f"\n[SYSTEM] Battle ended. Chat can be re-enabled.")
-        response = get_validated_input(
-            "Do you want to enable chat? (Y/N)",
-            validate_yes_no,
-            "Please enter Y or N",
-            default=False
-        )
-        if response:
-            host.chat_enabled = True
-            start_chat_input_thread(host, "Host")
-            print(f"\n[SYSTEM] Chat enabled! Type '/chat <message>' to send messages.")
-            print(f"[SYSTEM] Type '/endchat' to end the chat session.")
+            print(f"\n[SYSTEM] Battle ended. Chat can be re-enabled.")
+            with _pump_in_background(host, until=host.rematch_event.is_set):
+                response = ask_yes_no("Do you want to enable chat? (Y/N)", default=False)
+            if response:
+                host.chat_enabled = True
+                start_chat_input_thread(host, "Host")
+                print(f"\n[SYSTEM] Chat enabled! Type '/chat <message>' to send messages.")
+                print(f"[SYSTEM] Type '/endchat' to end the chat session.")
         
-        timeout = time.time() + 60.0 
-        while host.opponent_wants_rematch is None and time.time() < timeout:
-            try:
-                result = host.receive_message(timeout=0.5)
-                if result:
-                    msg, addr = result
-                    host.handle_message(msg, addr)
-                host.process_reliability()
-            except Exception as e:
-                print(f"Error during rematch wait: {e}")
-            time.sleep(0.1)
+            # Stop at the decision: a rematch BattleSetup sent right after it
+            # is left for the pump that runs once start_battle has reset our state
+            _pump_while(host, lambda: not host.rematch_event.is_set(), timeout=60.0, poll=0.5,
+                        max_messages=1)
         
-        if wants_rematch and host.opponent_wants_rematch:
-            print("\nBoth players want a rematch! Starting new battle...")
-            host.opponent_wants_rematch = None
-            return run_host_battle_loop(host)
-        elif not wants_rematch:
-            print("\nYou declined the rematch.")
-            if host.chat_enabled:
-                print("Chat session is active. Type '/endchat' to end the session and disconnect.")
-                while host.chat_enabled:
-                    try:
-                        result = host.receive_message(timeout=0.5)
-                        if result:
-                            msg, addr = result
-                            host.handle_message(msg, addr)
-                        host.process_reliability()
-                        time.sleep(0.1)
-                    except (EOFError, KeyboardInterrupt):
-                        break
-                print("\nChat session ended. Thanks for playing!")
-            else:
-                print("Thanks for playing!")
-            return False
-        elif host.opponent_wants_rematch is None:
-            print("\nTimeout waiting for opponent's response. Disconnecting...")
-            return False
-        else:
-            print("\nOpponent declined the rematch.")
-            if host.chat_enabled:
-                print("Chat session is active. Type '/endchat' to end the session and disconnect.")
-                while host.chat_enabled:
-                    try:
-                        result = host.receive_message(timeout=0.5)
-                        if result:
-                            msg, addr = result
-                            host.handle_message(msg, addr)
-                        host.process_reliability()
-                        time.sleep(0.1)
-                    except (EOFError, KeyboardInterrupt):
-                        break
-                print("\nChat session ended. Thanks for playing!")
+            if wants_rematch and host.opponent_wants_rematch:
+                print("\nBoth players want a rematch! Starting new battle...")
+                host.opponent_wants_rematch = None
+                host.rematch_event.clear()
+                continue
+            elif not wants_rematch:
+                print("\nYou declined the rematch.")
+                _chat_session_tail(host)
+                return False
+            elif host.opponent_wants_rematch is None:
+                print("\nTimeout waiting for opponent's response. Disconnecting...")
+                return False
             else:
-                print("Thanks for playing!")
-            return False
+                print("\nOpponent declined the rematch.")
+                _chat_session_tail(host)
+                return False
     
-    return False
+        return False
 
 def run_interactive_host():
     """Run host with interactive prompts."""
-    print("\n" + "="*60)
-    print("  POKEPROTOCOL - HOST MODE")
-    print("="*60)
+    print(f"\n{_BAR}\n  POKEPROTOCOL - HOST MODE\n{_BAR}")
 
     port = None
     host = None
@@ -708,7 +905,7 @@ def run_interactive_host():
         port = get_user_input(
             "Enter port to listen on",
             "8888" if port is None else str(port),
-            validator_func=lambda x: validate_port(x)
+            validator_func=validate_port
         )
 
         try:
@@ -716,47 +913,31 @@ def run_interactive_host():
             host = HostPeer(port=port)
             host.start_listening()
         except OSError as e:
-            error_str = str(e)
-            if "Address already in use" in error_str or "10048" in error_str or "EADDRINUSE" in error_str or "WSAEADDRINUSE" in error_str:
+            if _is_address_in_use(e):
                 print(f"\n✗ Port {port} is already in use!")
-                retry = get_validated_input(
-                    "Would you like to try a different port? (Y/N)",
-                    validate_yes_no,
-                    "Please enter Y or N"
-                )
+                retry = ask_yes_no("Would you like to try a different port? (Y/N)")
                 if not retry:
                     print("\nExiting...")
                     return
             else:
                 print(f"\n✗ Error initializing host: {e}")
-                retry = get_validated_input(
-                    "Would you like to try again? (Y/N)",
-                    validate_yes_no,
-                    "Please enter Y or N"
-                )
+                retry = ask_yes_no("Would you like to try again? (Y/N)")
                 if not retry:
                     print("\nExiting...")
                     return
         except Exception as e:
             print(f"\n✗ Unexpected error: {e}")
-            retry = get_validated_input(
-                "Would you like to try again? (Y/N)",
-                validate_yes_no,
-                "Please enter Y or N"
-            )
+            retry = ask_yes_no("Would you like to try again? (Y/N)")
             if not retry:
                 print("\nExiting...")
                 return
 
     def on_chat_received(sender_name, message_text):
-        if message_text.startswith("STICKER::"):
+        if message_text.startswith(_STICKER_PREFIX):
             try:
-                b64_content = message_text.split("::")[1]
-                decoded_art = base64.b64decode(b64_content).decode('utf-8')
+                decoded_art = _decode_sticker(message_text[len(_STICKER_PREFIX):])
                 
-                print(f"\n[CHAT] {sender_name} sent a sticker:")
-                print(decoded_art)
-                print("-" * 20)
+                print(f"\n[CHAT] {sender_name} sent a sticker:\n{decoded_art}\n{_STICKER_RULE}")
             except Exception:
                 print(f"\n[CHAT] {sender_name} sent a corrupt sticker.")
 
@@ -767,21 +948,13 @@ def run_interactive_host():
     host.on_chat_message = on_chat_received
     player_name = "Host"
 
-    print("\n" + "="*60)
-    print("  WAITING FOR JOINER TO CONNECT...")
-    print("="*60)
+    print(f"\n{_BAR}\n  WAITING FOR JOINER TO CONNECT...\n{_BAR}")
     print(f"Tell the other player to connect to:")
     print(f"  IP Address: <your_ip_address>")
     print(f"  Port: {port}")
     print("\nWaiting...")
 
-    timeout = time.time() + 120.0 
-    while not host.connected and time.time() < timeout:
-        result = host.receive_message(timeout=0.5)
-        if result:
-            msg, addr = result
-            host.handle_message(msg, addr)
-        host.process_reliability()
+    _pump_while(host, lambda: not host.connected, timeout=120.0)
 
     if not host.connected:
         print("\nConnection timeout! No joiner connected.")
@@ -800,32 +973,27 @@ def run_interactive_host():
 
 def run_interactive_joiner():
     """Run joiner with interactive prompts."""
-    print("\n" + "="*60)
-    print("  POKEPROTOCOL - JOINER MODE")
-    print("="*60)
+    print(f"\n{_BAR}\n  POKEPROTOCOL - JOINER MODE\n{_BAR}")
 
     host_ip = get_user_input("Enter host IP address", "127.0.0.1")
     host_port = get_user_input(
         "Enter host port",
         "8888",
-        validator_func=lambda x: validate_port(x)
+        validator_func=validate_port
     )
 
     local_port = get_user_input(
         "Enter your local port",
         "8889",
-        validator_func=lambda x: validate_port(x)
+        validator_func=validate_port
     )
 
     def on_chat_received(sender_name, message_text):
-        if message_text.startswith("STICKER::"):
+        if message_text.startswith(_STICKER_PREFIX):
             try:
-                b64_content = message_text.split("::")[1]
-                decoded_art = base64.b64decode(b64_content).decode('utf-8')
+                decoded_art = _decode_sticker(message_text[len(_STICKER_PREFIX):])
                 
-                print(f"\n[CHAT] {sender_name} sent a sticker:")
-                print(decoded_art)
-                print("-" * 20)
+                print(f"\n[CHAT] {sender_name} sent a sticker:\n{decoded_art}\n{_STICKER_RULE}")
             except Exception:
                 print(f"\n[CHAT] {sender_name} sent a corrupt sticker.")
           
@@ -847,19 +1015,14 @@ def run_interactive_joiner():
             connected = True
             print("✓ Connected to host!")
         except OSError as e:
-            error_str = str(e)
-            if "Address already in use" in error_str or "10048" in error_str or "EADDRINUSE" in error_str or "WSAEADDRINUSE" in error_str:
+            if _is_address_in_use(e):
                 print(f"\n✗ Port {local_port} is already in use!")
-                retry = get_validated_input(
-                    "Would you like to try a different local port? (Y/N)",
-                    validate_yes_no,
-                    "Please enter Y or N"
-                )
+                retry = ask_yes_no("Would you like to try a different local port? (Y/N)")
                 if retry:
                     local_port = get_user_input(
                         "Enter your local port",
                         str(local_port),
-                        validator_func=lambda x: validate_port(x)
+                        validator_func=validate_port
                     )
                     if joiner:
                         try:
@@ -871,11 +1034,7 @@ def run_interactive_joiner():
                     return
             else:
                 print(f"\n✗ Error initializing joiner: {e}")
-                retry = get_validated_input(
-                    "Would you like to try again? (Y/N)",
-                    validate_yes_no,
-                    "Please enter Y or N"
-                )
+                retry = ask_yes_no("Would you like to try again? (Y/N)")
                 if not retry:
                     print("\nExiting...")
                     return
@@ -892,8 +1051,7 @@ def run_interactive_joiner():
             print("3. Verify firewall settings allow UDP traffic")
             print("4. Ensure both computers are on the same network (or port forwarding is configured)")
             
-            retry = input("\nWould you like to try again with different settings? (Y/N): ").strip().upper()
-            if retry == 'Y':
+            if ask_yes_no("\nWould you like to try again with different settings? (Y/N)", default=False):
                 host_ip = get_user_input("Enter host IP address", host_ip)
                 port_str = get_user_input("Enter host port", str(host_port))
                 try:
@@ -917,8 +1075,7 @@ def run_interactive_joiner():
                 return
         except Exception as e:
             print(f"\n✗ Unexpected error: {e}")
-            retry = input("\nWould you like to try again? (Y/N): ").strip().upper()
-            if retry != 'Y':
+            if not ask_yes_no("\nWould you like to try again? (Y/N)", default=False):
                 print("\nExiting...")
                 return
             if joiner:
@@ -936,223 +1093,143 @@ def run_interactive_joiner():
 
 
 def run_joiner_battle_loop(joiner):
-    """Run a single battle loop for the joiner. Can be called multiple times for rematches."""
-    if not hasattr(joiner, '_battle_count') or joiner._battle_count == 0:
+    """Run the joiner's battle loop, starting a new battle for each accepted rematch."""
+    # Pre-battle chat only happens before the first battle of a session
+    if not getattr(joiner, '_battle_count', 0):
         run_pre_battle_chat(joiner, "Joiner", "Host")
 
         stop_chat_input_thread()
-        time.sleep(0.2)
         clear_input_stream()
         print("\n" * 2)
 
         joiner._battle_count = 0
+
+    while True:
+        joiner._battle_count += 1
+        joiner.chat_enabled = False
     
-    joiner._battle_count += 1
-    joiner.chat_enabled = False
-    
-    stop_chat_input_thread()
-    clear_input_stream()
+        stop_chat_input_thread()
+        clear_input_stream()
     
-    pokemon_name = select_pokemon()
+        pokemon_name = select_pokemon()
 
-    opponent_already_selected = (joiner.battle_state and 
-                                  joiner.battle_state.opponent_pokemon is not None and
-                                  joiner.battle_state.state.value != "GAME_OVER")
+        opponent_already_selected = (joiner.battle_state and 
+                                      joiner.battle_state.opponent_pokemon is not None and
+                                      joiner.battle_state.state.value != "GAME_OVER")
     
-    preserved_opponent = None
-    if opponent_already_selected:
-        preserved_opponent = joiner.battle_state.opponent_pokemon
+        preserved_opponent = None
+        if opponent_already_selected:
+            preserved_opponent = joiner.battle_state.opponent_pokemon
 
-    print(f"\nStarting battle with {pokemon_name}...")
-    joiner.start_battle(pokemon_name)
+        print(f"\nStarting battle with {pokemon_name}...")
+        joiner.start_battle(pokemon_name)
     
-    if preserved_opponent and joiner.battle_state:
-        from battle import BattlePokemon
-        fresh_opponent = BattlePokemon(
-            preserved_opponent.pokemon,
-            preserved_opponent.special_attack_uses,
-            preserved_opponent.special_defense_uses
-        )
-        joiner.battle_state.opponent_pokemon = fresh_opponent
-        joiner.battle_state.advance_to_waiting()
-
-    if not (joiner.battle_state and 
-            joiner.battle_state.my_pokemon and 
-            joiner.battle_state.opponent_pokemon):
-        print("Waiting for opponent to select Pokémon...")
-        timeout = time.time() + 60.0
-        while time.time() < timeout:
-            if (joiner.battle_state and 
-                joiner.battle_state.my_pokemon and 
-                joiner.battle_state.opponent_pokemon):
-                break
-            
-            result = joiner.receive_message(timeout=0.5)
-            if result:
-                msg, addr = result
-                joiner.handle_message(msg, addr)
-            joiner.process_reliability()
-            time.sleep(0.1)
+        if preserved_opponent and joiner.battle_state:
+            preserved_opponent.restore_hp()
+            joiner.battle_state.opponent_pokemon = preserved_opponent
+            joiner.battle_state.advance_to_waiting()
+
+        if not _both_pokemon_ready(joiner):
+            print("Waiting for opponent to select Pokémon...")
+            _pump_while(joiner, lambda: not _both_pokemon_ready(joiner), timeout=60.0)
         
-        if not (joiner.battle_state and 
-                joiner.battle_state.my_pokemon and 
-                joiner.battle_state.opponent_pokemon):
-            print("Timeout waiting for opponent's Pokémon")
-            return False
-
-    print("\n" + "="*60)
-    print("  BATTLE START!")
-    print("="*60)
-    print("[SYSTEM] Chat is disabled during battle.")
-
-    move_db = MoveDatabase()
-    battle_active = True
-    
-    while battle_active and not joiner.battle_state.is_game_over():
-        result = joiner.receive_message(timeout=0.1)
-        if result:
-            msg, addr = result
-            joiner.handle_message(msg, addr)
-
-        joiner.process_reliability()
-
-        if joiner.battle_state and joiner.battle_state.is_my_turn():
-            status = joiner.battle_state.get_battle_status()
-            print(f"\n{'='*60}")
-            print(f"  YOUR TURN!")
-            print(f"{'='*60}")
-            print(f"{status}")
-
-            move_name = select_move(joiner.my_pokemon.pokemon.name if joiner.my_pokemon else None)
-            move = move_db.get_move(move_name)
+            if not _both_pokemon_ready(joiner):
+                print("Timeout waiting for opponent's Pokémon")
+                return False
 
-            if move and joiner.battle_state:
-                from messages import AttackAnnounce
-                announce = AttackAnnounce(
-                    move.name,
-                    joiner.reliability.get_next_sequence_number()
-                )
-                joiner.send_message(announce)
-                print(f"Used {move.name}!")
-                joiner.battle_state.mark_my_turn_taken(move)
-        else:
-            pass
-
-        time.sleep(0.1)
+        sys.stdout.write(_BATTLE_START_BANNER)
 
-    if joiner.battle_state.is_game_over():
-        winner = joiner.battle_state.get_winner()
-        winner_pokemon = winner
-        loser = joiner.battle_state.opponent_pokemon.pokemon.name if winner == joiner.my_pokemon.pokemon.name else joiner.my_pokemon.pokemon.name
+        battle_active = True
+        bs = joiner.battle_state
+        next_seq = joiner.reliability.get_next_sequence_number
+        is_game_over = bs.is_game_over
+        is_my_turn = bs.is_my_turn
+    
+        with selectors.DefaultSelector() as sel:
+            sel.register(joiner.socket, selectors.EVENT_READ)
+            while battle_active and not is_game_over():
+                # Only drain what is already queued when it is our move
+                _pump_messages(joiner, sel, 0 if is_my_turn() else 0.5)
+
+                if is_my_turn():
+                    status = bs.get_battle_status()
+                    _emit(_YOUR_TURN_HEADER, status)
+
+                    with _pump_in_background(joiner):
+                        move = select_move(joiner.my_pokemon.pokemon if joiner.my_pokemon else None)
+
+                    if move:
+                        announce = AttackAnnounce(move.name, next_seq())
+                        joiner.send_message(announce)
+                        print(f"Used {move.name}!")
+                        bs.mark_my_turn_taken(move)
+
+        if joiner.battle_state.is_game_over():
+            winner = joiner.battle_state.get_winner()
+            my_name = joiner.my_pokemon.pokemon.name
+            opp_name = joiner.battle_state.opponent_pokemon.pokemon.name
+            loser = opp_name if winner == my_name else my_name
         
-        print(f"\n" + "="*60)
-        print(f"  BATTLE COMPLETE!")
-        print(f"  Winner: {winner_pokemon}")
-        print(f"  Loser: {loser}")
-        print("="*60)
+            print(f"{_BATTLE_COMPLETE_HEADER}  Winner: {winner}\n  Loser: {loser}\n{_BAR}")
         
-        stop_chat_input_thread()
+            stop_chat_input_thread()
         
-        wants_rematch = get_validated_input(
-            "\nStart a new battle? (Y/N)",
-            validate_yes_no,
-            "Please enter Y or N"
-        )
+            with _pump_in_background(joiner, until=joiner.rematch_event.is_set):
+                wants_rematch = ask_yes_no("\nStart a new battle? (Y/N)")
         
-        from messages import RematchRequest
-        rematch_msg = RematchRequest(wants_rematch, joiner.reliability.get_next_sequence_number())
-        joiner.send_message(rematch_msg)
-        print(f"\nWaiting for opponent's response...")
+            rematch_msg = RematchRequest(wants_rematch, joiner.reliability.get_next_sequence_number())
+            joiner.send_message(rematch_msg)
+            print(f"\nWaiting for opponent's response...")
         
-        print(f"\n[SYSTEM] Battle ended. Chat can be re-enabled.")
-        response = get_validated_input(
-            "Do you want to enable chat? (Y/N)",
-            validate_yes_no,
-            "Please enter Y or N",
-            default=False
-        )
-        if response:
-            joiner.chat_enabled = True
-            start_chat_input_thread(joiner, "Joiner")
-            print(f"\n[SYSTEM] Chat enabled! Type '/chat <message>' to send messages.")
-            print(f"[SYSTEM] Type '/endchat' to end the chat session.")
+            print(f"\n[SYSTEM] Battle ended. Chat can be re-enabled.")
+            with _pump_in_background(joiner, until=joiner.rematch_event.is_set):
+                response = ask_yes_no("Do you want to enable chat? (Y/N)", default=False)
+            if response:
+                joiner.chat_enabled = True
+                start_chat_input_thread(joiner, "Joiner")
+                print(f"\n[SYSTEM] Chat enabled! Type '/chat <message>' to send messages.")
+                print(f"[SYSTEM] Type '/endchat' to end the chat session.")
         
-        timeout = time.time() + 60.0 
-        while joiner.opponent_wants_rematch is None and time.time() < timeout:
-            try:
-                result = joiner.receive_message(timeout=0.5)
-                if result:
-                    msg, addr = result
-                    joiner.handle_message(msg, addr)
-                joiner.process_reliability()
-            except Exception as e:
-                print(f"Error during rematch wait: {e}")
-            time.sleep(0.1)
+            # Stop at the decision: a rematch BattleSetup sent right after it
+            # is left for the pump that runs once start_battle has reset our state
+            _pump_while(joiner, lambda: not joiner.rematch_event.is_set(), timeout=60.0, poll=0.5,
+                        max_messages=1)
         
-        if wants_rematch and joiner.opponent_wants_rematch:
-            print("\nBoth players want a rematch! Starting new battle...")
-            joiner.opponent_wants_rematch = None
-            return run_joiner_battle_loop(joiner)
-        elif not wants_rematch:
-            print("\nYou declined the rematch.")
-            if joiner.chat_enabled:
-                print("Chat session is active. Type '/endchat' to end the session and disconnect.")
-                while joiner.chat_enabled:
-                    try:
-                        result = joiner.receive_message(timeout=0.5)
-                        if result:
-                            msg, addr = result
-                            joiner.handle_message(msg, addr)
-                        joiner.process_reliability()
-                        time.sleep(0.1)
-                    except (EOFError, KeyboardInterrupt):
-                        break
-                print("\nChat session ended. Thanks for playing!")
-            else:
-                print("Thanks for playing!")
-            return False
-        elif joiner.opponent_wants_rematch is None:
-            print("\nTimeout waiting for opponent's response. Disconnecting...")
-            return False
-        else:
-            print("\nOpponent declined the rematch.")
-            if joiner.chat_enabled:
-                print("Chat session is active. Type '/endchat' to end the session and disconnect.")
-                while joiner.chat_enabled:
-                    try:
-                        result = joiner.receive_message(timeout=0.5)
-                        if result:
-                            msg, addr = result
-                            joiner.handle_message(msg, addr)
-                        joiner.process_reliability()
-                        time.sleep(0.1)
-                    except (EOFError, KeyboardInterrupt):
-                        break
-                print("\nChat session ended. Thanks for playing!")
+            if wants_rematch and joiner.opponent_wants_rematch:
+                print("\nBoth players want a rematch! Starting new battle...")
+                joiner.opponent_wants_rematch = None
+                joiner.rematch_event.clear()
+                continue
+            elif not wants_rematch:
+                print("\nYou declined the rematch.")
+                _chat_session_tail(joiner)
+                return False
+            elif joiner.opponent_wants_rematch is None:
+                print("\nTimeout waiting for opponent's response. Disconnecting...")
+                return False
             else:
-                print("Thanks for playing!")
-            return False
+                print("\nOpponent declined the rematch.")
+                _chat_session_tail(joiner)
+                return False
     
-    return False
+        return False
 
 
 def run_interactive_spectator():
     """Run spectator with interactive prompts."""
-    print("\n" + "="*60)
-    print("  POKEPROTOCOL - SPECTATOR MODE")
-    print("="*60)
+    print(f"\n{_BAR}\n  POKEPROTOCOL - SPECTATOR MODE\n{_BAR}")
 
     host_ip = get_user_input("Enter host IP address", "127.0.0.1")
     host_port = get_user_input(
         "Enter host port",
         "8888",
-        validator_func=lambda x: validate_port(x)
+        validator_func=validate_port
     )
 
     local_port = get_user_input(
         "Enter your local port",
         "8890",
-        validator_func=lambda x: validate_port(x)
+        validator_func=validate_port
     )
 
     connected = False
@@ -1164,21 +1241,19 @@ def run_interactive_spectator():
             spectator.start_listening()
 
             def on_battle_update(update_str):
-                print(f"[BATTLE] {update_str}")
+                _write_stdout(_BATTLE_PREFIX + update_str.encode("utf-8", "replace") + b"\n")
             
             def on_chat_received(sender_name, message_text):
-                if message_text.startswith("STICKER::"):
+                if message_text.startswith(_STICKER_PREFIX):
                     try:
-                        b64_content = message_text.split("::")[1]
-                        decoded_art = base64.b64decode(b64_content).decode('utf-8')
+                        decoded_art = _decode_sticker(message_text[len(_STICKER_PREFIX):])
                         
-                        print(f"\n[CHAT] {sender_name} sent a sticker:")
-                        print(decoded_art)
-                        print("-" * 20)
+                        text = f"\n[CHAT] {sender_name} sent a sticker:\n{decoded_art}\n{_STICKER_RULE}\n"
                     except Exception:
-                        print(f"\n[CHAT] {sender_name} sent a corrupt sticker.")
+                        text = f"\n[CHAT] {sender_name} sent a corrupt sticker.\n"
                 else:
-                    print(f"\n[CHAT] {sender_name}: {message_text}")
+                    text = f"\n[CHAT] {sender_name}: {message_text}\n"
+                _write_stdout(text.encode("utf-8", "replace"))
 
             spectator.on_battle_update = on_battle_update
             spectator.on_chat_message = on_chat_received
@@ -1188,19 +1263,14 @@ def run_interactive_spectator():
             connected = True
             print("✓ Connected as spectator!")
         except OSError as e:
-            error_str = str(e)
-            if "Address already in use" in error_str or "10048" in error_str or "EADDRINUSE" in error_str or "WSAEADDRINUSE" in error_str:
+            if _is_address_in_use(e):
                 print(f"\n✗ Port {local_port} is already in use!")
-                retry = get_validated_input(
-                    "Would you like to try a different local port? (Y/N)",
-                    validate_yes_no,
-                    "Please enter Y or N"
-                )
+                retry = ask_yes_no("Would you like to try a different local port? (Y/N)")
                 if retry:
                     local_port = get_user_input(
                         "Enter your local port",
                         str(local_port),
-                        validator_func=lambda x: validate_port(x)
+                        validator_func=validate_port
                     )
                     if spectator:
                         try:
@@ -1212,11 +1282,7 @@ def run_interactive_spectator():
                     return
             else:
                 print(f"\n✗ Error initializing spectator: {e}")
-                retry = get_validated_input(
-                    "Would you like to try again? (Y/N)",
-                    validate_yes_no,
-                    "Please enter Y or N"
-                )
+                retry = ask_yes_no("Would you like to try again? (Y/N)")
                 if not retry:
                     print("\nExiting...")
                     return
@@ -1233,8 +1299,7 @@ def run_interactive_spectator():
             print("3. Verify firewall settings allow UDP traffic")
             print("4. Ensure both computers are on the same network (or port forwarding is configured)")
             
-            retry = input("\nWould you like to try again with different settings? (Y/N): ").strip().upper()
-            if retry == 'Y':
+            if ask_yes_no("\nWould you like to try again with different settings? (Y/N)", default=False):
                 host_ip = get_user_input("Enter host IP address", host_ip)
                 port_str = get_user_input("Enter host port", str(host_port))
                 try:
@@ -1258,8 +1323,7 @@ def run_interactive_spectator():
                 return
         except Exception as e:
             print(f"\n✗ Unexpected error: {e}")
-            retry = input("\nWould you like to try again? (Y/N): ").strip().upper()
-            if retry != 'Y':
+            if not ask_yes_no("\nWould you like to try again? (Y/N)", default=False):
                 print("\nExiting...")
                 return
             if spectator:
@@ -1273,52 +1337,33 @@ def run_interactive_spectator():
     start_chat_input_thread(spectator, player_name)
 
     try:
-        while True:
-            result = spectator.receive_message(timeout=0.5)
-            if result:
-                msg, addr = result
-                spectator.handle_message(msg, addr)
-                
-                if spectator.game_over:
-                    print("\nWaiting for players to decide on rematch...")
-                    timeout = time.time() + 60.0 
-                    while (spectator.rematch_decisions["host"] is None or 
-                           spectator.rematch_decisions["joiner"] is None) and time.time() < timeout:
-                        result = spectator.receive_message(timeout=0.5)
-                        if result:
-                            msg, addr = result
-                            spectator.handle_message(msg, addr)
-                        spectator.process_reliability()
-                        time.sleep(0.1)
-                    
-                    host_wants = spectator.rematch_decisions["host"]
-                    joiner_wants = spectator.rematch_decisions["joiner"]
+        with selectors.DefaultSelector() as sel:
+            sel.register(spectator.socket, selectors.EVENT_READ)
+            while True:
+                # Bounded wait: the chat thread may queue messages that need
+                # retransmitting while this thread is blocked
+                _pump_messages(spectator, sel, 0.5)
+                if not spectator.game_over:
+                    continue
+                print("\nWaiting for players to decide on rematch...")
+                host_wants, joiner_wants, timed_out = _await_rematch_decisions(spectator, sel)
                     
-                    if host_wants is not None and joiner_wants is not None:
-                        if host_wants and joiner_wants:
-                            print("\n✓ Both players want a rematch! Battle will restart...")
-                            spectator.game_over = False
-                            spectator.winner = None
-                            spectator.loser = None
-                            spectator.rematch_decisions = {"host": None, "joiner": None}
-                            spectator.host_hp = None
-                            spectator.joiner_hp = None
-                            print("\nWaiting for new battle to start...")
-                        else:
-                            print("\n✗ Rematch declined. Battle ended.")
-                            if not host_wants:
-                                print("  Host declined rematch")
-                            if not joiner_wants:
-                                print("  Joiner declined rematch")
-                            break
-                    elif time.time() >= timeout:
-                        print("\n✗ Timeout waiting for rematch decisions. Battle ended.")
-                        break
+                if not timed_out:
+                    if host_wants and joiner_wants:
+                        print("\n✓ Both players want a rematch! Battle will restart...")
+                        spectator.reset_for_rematch()
+                        print("\nWaiting for new battle to start...")
                     else:
-                        continue
-                        
-            spectator.process_reliability()
-            time.sleep(0.1)
+                        lines = ["\n✗ Rematch declined. Battle ended."]
+                        if not host_wants:
+                            lines.append("  Host declined rematch")
+                        if not joiner_wants:
+                            lines.append("  Joiner declined rematch")
+                        _emit(*lines)
+                        break
+                else:
+                    print("\n✗ Timeout waiting for rematch decisions. Battle ended.")
+                    break
     except KeyboardInterrupt:
         print("\n\nExiting spectator mode...")
     
@@ -1326,15 +1371,18 @@ def run_interactive_spectator():
     spectator.disconnect()
 
 
+_CHOICE_TO_MODE = {1: 'host', 2: 'joiner', 3: 'spectator'}
+_MODE_RUNNERS = {
+    'host': run_interactive_host,
+    'joiner': run_interactive_joiner,
+    'spectator': run_interactive_spectator,
+}
+
+
 def main():
     """Main entry point."""
-    print("\n" + "="*60)
-    print("  POKEPROTOCOL - INTERACTIVE BATTLE CLIENT")
-    print("="*60)
+    print(f"\n{_BAR}\n  POKEPROTOCOL - INTERACTIVE BATTLE CLIENT\n{_BAR}")
 
-    stop_chat_input_thread()
-    clear_input_stream()
-    
     if len(sys.argv) > 1:
         mode = sys.argv[1].lower()
     else:
@@ -1345,26 +1393,14 @@ def main():
 
         choice = get_validated_input(
             "\nEnter choice (1-3)",
-            lambda x: validate_integer(x, min_val=1, max_val=3),
+            _int_validator(1, 3),
             "Please enter a number between 1 and 3"
         )
+        mode = _CHOICE_TO_MODE[choice]
 
-        if choice == 1:
-            mode = 'host'
-        elif choice == 2:
-            mode = 'joiner'
-        elif choice == 3:
-            mode = 'spectator'
-        else:
-            print("Invalid choice")
-            return
-
-    if mode == 'host':
-        run_interactive_host()
-    elif mode == 'joiner':
-        run_interactive_joiner()
-    elif mode == 'spectator':
-        run_interactive_spectator()
+    runner = _MODE_RUNNERS.get(mode)
+    if runner:
+        runner()
     else:
         print(f"Unknown mode: {mode}")
         print("Usage: python interactive_battle.py [host|joiner|spectator]")
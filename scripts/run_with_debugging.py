@@ -12,7 +12,9 @@ import threading
 from pathlib import Path
 
 # Add src directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+_SRC_DIR = str(Path(__file__).parent.parent / 'src')
+if _SRC_DIR not in sys.path:
+    sys.path.insert(0, _SRC_DIR)
 
 
 def run_peer_mode(mode: str, port: int = None, host_ip: str = None, host_port: int = None):
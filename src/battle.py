@@ -77,6 +77,10 @@ class BattlePokemon:
         """
         return self.current_hp <= 0
 
+    def restore_hp(self):
+        """Restore HP to full in place (used when a rematch reuses this Pokémon)."""
+        self.current_hp = self.max_hp
+
     def can_use_special_attack_boost(self) -> bool:
         """
         Check if special attack boost is available.
@@ -262,6 +262,11 @@ class MoveDatabase:
         """Initialize the move database with default moves."""
         self.moves: Dict[str, Move] = {}
         self._populate_default_moves()
+        
+        # Index moves by type once; the move set is fixed after population
+        self._moves_by_type: Dict[str, List[Move]] = {}
+        for move in self.moves.values():
+            self._moves_by_type.setdefault(move.move_type, []).append(move)
     
     def _populate_default_moves(self):
         """Populate the database with default moves across all types."""
@@ -410,6 +415,15 @@ class MoveDatabase:
         """
         return list(self.moves.keys())
     
+    def get_all_moves(self) -> list:
+        """
+        Get a list of all available moves.
+        
+        Returns:
+            List of Move objects
+        """
+        return list(self.moves.values())
+    
     def get_moves_by_type(self, move_type: str) -> list:
         """
         Get all moves of a specific type.
@@ -420,5 +434,4 @@ class MoveDatabase:
         Returns:
             List of Move objects of that type
         """
-        move_type_lower = move_type.lower()
-        return [move for move in self.moves.values() if move.move_type == move_type_lower]
+        return list(self._moves_by_type.get(move_type.lower(), ()))
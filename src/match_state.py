@@ -142,8 +142,8 @@ class MatchStateManager:
         Returns:
             True if both selected, False if timeout
         """
-        start_time = time.time()
-        while time.time() < start_time + timeout:
+        start_time = time.monotonic()
+        while time.monotonic() < start_time + timeout:
             state = self.load_state()
             if state.get("host_selected") and state.get("joiner_selected"):
                 return True
@@ -10,9 +10,10 @@ This module implements the main peer classes for the PokeProtocol:
 """
 
 import socket
-import select
+import selectors
 import time
 import random
+import threading
 from typing import Optional, Callable, Tuple, List, Dict, Deque
 from collections import deque
 from game_data import PokemonDataLoader, Pokemon, MoveDatabase, Move
@@ -43,6 +44,7 @@ class PendingMessage:
         timestamp: When the message was first sent
         timeout: Timeout duration in seconds
         target_address: Target address for retransmissions (None = use peer_address)
+        data: Serialized bytes from the first send, reused for retransmissions
     """
     
     def __init__(self, message: Message, sequence_number: int, timeout: float = 0.5, target_address: Optional[Tuple[str, int]] = None):
@@ -58,9 +60,10 @@ class PendingMessage:
         self.message = message
         self.sequence_number = sequence_number
         self.retry_count = 0
-        self.timestamp = time.time()
+        self.timestamp = time.monotonic()
         self.timeout = timeout
         self.target_address = target_address
+        self.data: Optional[bytes] = None
     
     def should_retry(self, max_retries: int = 3) -> bool:
         """
@@ -75,13 +78,13 @@ class PendingMessage:
         if self.retry_count >= max_retries:
             return False
         
-        elapsed = time.time() - self.timestamp
+        elapsed = time.monotonic() - self.timestamp
         return elapsed >= self.timeout
     
     def retry(self):
         """Increment retry count and update timestamp."""
         self.retry_count += 1
-        self.timestamp = time.time()
+        self.timestamp = time.monotonic()
 
 
 class ReliabilityLayer:
@@ -93,6 +96,9 @@ class ReliabilityLayer:
     - Message acknowledgments
     - Retransmission logic
     - Duplicate detection
+    
+    Sequence numbers and the pending table are guarded by a lock, because the
+    chat input thread sends while another thread receives ACKs and retransmits.
     """
     
     def __init__(self, max_retries: int = 3, timeout: float = 0.5):
@@ -109,6 +115,9 @@ class ReliabilityLayer:
         self.pending_messages: Dict[int, PendingMessage] = {}
         self.received_sequences: Deque[int] = deque(maxlen=1000)  # Prevent duplicates
         self.last_ack_time: Dict[int, float] = {}
+        self.cleanup_interval = 1.0  # Seconds between sweeps of last_ack_time
+        self._next_cleanup = time.monotonic()
+        self._lock = threading.RLock()
     
     def get_next_sequence_number(self) -> int:
         """
@@ -117,8 +126,9 @@ class ReliabilityLayer:
         Returns:
             Next sequence number
         """
-        self.sequence_counter += 1
-        return self.sequence_counter
+        with self._lock:
+            self.sequence_counter += 1
+            return self.sequence_counter
     
     def send_message(self, message: Message, set_sequence: bool = True, target_address: Optional[Tuple[str, int]] = None) -> int:
         """
@@ -132,15 +142,16 @@ class ReliabilityLayer:
         Returns:
             Assigned sequence number
         """
-        seq_num = self.get_next_sequence_number()
-        
-        # Set sequence number if message supports it
-        if set_sequence and hasattr(message, 'sequence_number'):
-            message.sequence_number = seq_num
-        
-        # Track as pending if it requires acknowledgment
-        if self._requires_ack(message):
-            self.pending_messages[seq_num] = PendingMessage(message, seq_num, self.timeout, target_address)
+        with self._lock:
+            seq_num = self.get_next_sequence_number()
+            
+            # Set sequence number if message supports it
+            if set_sequence and hasattr(message, 'sequence_number'):
+                message.sequence_number = seq_num
+            
+            # Track as pending if it requires acknowledgment
+            if self._requires_ack(message):
+                self.pending_messages[seq_num] = PendingMessage(message, seq_num, self.timeout, target_address)
         
         return seq_num
     
@@ -151,9 +162,10 @@ class ReliabilityLayer:
         Args:
             ack_number: The acknowledged sequence number
         """
-        if ack_number in self.pending_messages:
-            del self.pending_messages[ack_number]
-            self.last_ack_time[ack_number] = time.time()
+        with self._lock:
+            if ack_number in self.pending_messages:
+                del self.pending_messages[ack_number]
+                self.last_ack_time[ack_number] = time.monotonic()
     
     def check_retransmissions(self) -> list:
         """
@@ -164,18 +176,19 @@ class ReliabilityLayer:
         """
         retransmissions = []
         
-        # Get all sequence numbers to avoid modification during iteration
-        seq_nums = list(self.pending_messages.keys())
-        
-        for seq_num in seq_nums:
-            pending = self.pending_messages[seq_num]
+        with self._lock:
+            # Get all sequence numbers to avoid modification during iteration
+            seq_nums = list(self.pending_messages.keys())
             
-            if pending.should_retry(self.max_retries):
-                pending.retry()
-                retransmissions.append((seq_num, pending.message))
-            elif pending.retry_count >= self.max_retries:
-                # Exceeded max retries - remove from pending
-                del self.pending_messages[seq_num]
+            for seq_num in seq_nums:
+                pending = self.pending_messages[seq_num]
+                
+                if pending.should_retry(self.max_retries):
+                    pending.retry()
+                    retransmissions.append((seq_num, pending.message))
+                elif pending.retry_count >= self.max_retries:
+                    # Exceeded max retries - remove from pending
+                    del self.pending_messages[seq_num]
         
         return retransmissions
     
@@ -209,6 +222,44 @@ class ReliabilityLayer:
         """
         return len(self.pending_messages) > 0
     
+    def next_timer_in(self) -> Optional[float]:
+        """
+        Get the time until the next retransmission check is due.
+        
+        Returns:
+            Seconds until the earliest pending message times out (0 if overdue),
+            or None if nothing is pending
+        """
+        # Snapshot: another thread (chat input) may send while we scan
+        with self._lock:
+            pending = list(self.pending_messages.values())
+        if not pending:
+            return None
+        
+        next_due = min(p.timestamp + p.timeout for p in pending)
+        return max(0.0, next_due - time.monotonic())
+    
+    def is_due(self, retransmit_at: Optional[float] = None) -> bool:
+        """
+        Check whether process_reliability() has any work to do right now.
+        
+        Args:
+            retransmit_at: Monotonic time of the earliest retransmission, if the
+                caller already derived it from next_timer_in() (float('inf') when
+                nothing is pending); None looks it up here
+            
+        Returns:
+            True if a pending message has timed out or the ACK sweep is due
+        """
+        now = time.monotonic()
+        if retransmit_at is None:
+            next_timer = self.next_timer_in()
+            if next_timer is not None and next_timer <= 0:
+                return True
+        elif now >= retransmit_at:
+            return True
+        return now >= self._next_cleanup
+    
     def _requires_ack(self, message: Message) -> bool:
         """
         Determine if a message type requires acknowledgment.
@@ -233,20 +284,23 @@ class ReliabilityLayer:
         Args:
             max_age: Maximum age in seconds
         """
-        current_time = time.time()
-        old_acks = [
-            seq for seq, timestamp in self.last_ack_time.items()
-            if current_time - timestamp > max_age
-        ]
-        for seq in old_acks:
-            del self.last_ack_time[seq]
+        current_time = time.monotonic()
+        self._next_cleanup = current_time + self.cleanup_interval
+        with self._lock:
+            old_acks = [
+                seq for seq, timestamp in self.last_ack_time.items()
+                if current_time - timestamp > max_age
+            ]
+            for seq in old_acks:
+                del self.last_ack_time[seq]
     
     def reset(self):
         """Reset the reliability layer state."""
-        self.sequence_counter = 0
-        self.pending_messages.clear()
-        self.received_sequences.clear()
-        self.last_ack_time.clear()
+        with self._lock:
+            self.sequence_counter = 0
+            self.pending_messages.clear()
+            self.received_sequences.clear()
+            self.last_ack_time.clear()
 
 
 # ============================================================================
@@ -274,6 +328,7 @@ class BasePeer:
         """
         self.port = port
         self.socket = None
+        self._selector: Optional[selectors.BaseSelector] = None
         self.peer_address: Optional[Tuple[str, int]] = None
         self.reliability = ReliabilityLayer()
         
@@ -286,6 +341,8 @@ class BasePeer:
         self.connected = False
         self.battle_seed: Optional[int] = None
         self.opponent_wants_rematch: Optional[bool] = None
+        self.rematch_event = threading.Event()  # Set once the opponent's rematch decision arrives
+        self._early_battle_setup: Optional[Message] = None  # Rematch setup received before start_battle
         
         # Callbacks
         self.on_chat_message: Optional[Callable[[str, str], None]] = None
@@ -309,6 +366,12 @@ class BasePeer:
         self.socket.bind(('', self.port))
         self.socket.setblocking(False)
 
+        # Register once so receive_message() waits on a long-lived selector
+        if self._selector:
+            self._selector.close()
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self.socket, selectors.EVENT_READ)
+
         # Enable broadcast if requested
         if enable_broadcast:
             self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
@@ -361,8 +424,11 @@ class BasePeer:
         # Pass target address so retransmissions go to the correct address
         seq_num = self.reliability.send_message(message, target_address=target)
 
-        # Serialize and send
+        # Serialize once; retransmissions resend the same bytes
         data = message.serialize()
+        pending = self.reliability.pending_messages.get(seq_num)
+        if pending:
+            pending.data = data
         self._send_datagram(data, target)
         
         # Debug logging
@@ -425,26 +491,13 @@ class BasePeer:
         Returns:
             Tuple of (Message, address) or None if timeout
         """
-        if not self.socket:
+        if not self.socket or not self._selector:
             return None
         
         try:
-            ready, _, _ = select.select([self.socket], [], [], timeout)
-            if ready:
+            if self._selector.select(timeout):
                 data, address = self.socket.recvfrom(4096)
-                message = Message.deserialize(data)
-                
-                # Debug logging
-                if self.debug_logger:
-                    seq_num = getattr(message, 'sequence_number', None)
-                    self.debug_logger.log_message_received(
-                        message.message_type.value if hasattr(message.message_type, 'value') else str(message.message_type),
-                        address,
-                        seq_num,
-                        message
-                    )
-                
-                return message, address
+                return self._decode_datagram(data, address), address
         except OSError as e:
             # Handle network errors gracefully (connection closed, etc.)
             if "10054" not in str(e):  # Don't spam for "connection forcibly closed"
@@ -459,6 +512,70 @@ class BasePeer:
         
         return None
     
+    def receive_pending(self, max_messages: int = 32) -> List[Tuple[Message, Tuple[str, int]]]:
+        """
+        Drain datagrams already queued on the socket without waiting.
+        
+        The socket is non-blocking, so this reads until recvfrom() would block
+        and costs one syscall per datagram instead of a select() plus a recvfrom().
+        
+        Args:
+            max_messages: Maximum number of datagrams to read in one call
+            
+        Returns:
+            List of (Message, address) tuples in arrival order
+        """
+        messages = []
+        if not self.socket:
+            return messages
+        
+        for _ in range(max_messages):
+            try:
+                data, address = self.socket.recvfrom(4096)
+            except BlockingIOError:
+                break
+            except OSError as e:
+                if "10054" in str(e):  # ICMP port unreachable on Windows; skip it
+                    continue
+                if self.debug_logger:
+                    self.debug_logger.log_error(f"Error receiving message: {e}", e, {})
+                print(f"Error receiving message: {e}")
+                break
+            
+            try:
+                messages.append((self._decode_datagram(data, address), address))
+            except Exception as e:
+                if self.debug_logger:
+                    self.debug_logger.log_error(f"Error receiving message: {e}", e, {})
+                print(f"Error receiving message: {e}")
+        
+        return messages
+    
+    def _decode_datagram(self, data: bytes, address: Tuple[str, int]) -> Message:
+        """
+        Deserialize a received datagram and log it.
+        
+        Args:
+            data: Raw datagram payload
+            address: Sender's address
+            
+        Returns:
+            Parsed message
+        """
+        message = Message.deserialize(data)
+        
+        # Debug logging
+        if self.debug_logger:
+            seq_num = getattr(message, 'sequence_number', None)
+            self.debug_logger.log_message_received(
+                message.message_type.value if hasattr(message.message_type, 'value') else str(message.message_type),
+                address,
+                seq_num,
+                message
+            )
+        
+        return message
+    
     def handle_message(self, message: Message, address: Tuple[str, int]):
         """
         Handle an incoming message.
@@ -652,10 +769,12 @@ class BasePeer:
             pending = self.reliability.pending_messages.get(seq_num)
             target = pending.target_address if pending and pending.target_address else self.peer_address
             if target:
-                # Ensure message has the original sequence number
-                if hasattr(message, 'sequence_number'):
-                    message.sequence_number = seq_num
-                data = message.serialize()
+                data = pending.data if pending else None
+                if data is None:
+                    # Ensure message has the original sequence number
+                    if hasattr(message, 'sequence_number'):
+                        message.sequence_number = seq_num
+                    data = message.serialize()
                 self._send_datagram(data, target)
         
         # Cleanup old ACKs
@@ -676,6 +795,9 @@ class BasePeer:
         if self.debug_logger:
             self.debug_logger.log_disconnection(self.peer_address)
         self.connected = False
+        if self._selector:
+            self._selector.close()
+            self._selector = None
         if self.socket:
             self.socket.close()
         self.reliability.reset()
@@ -896,6 +1018,23 @@ class HostPeer(BasePeer):
         if address not in self.spectators or len(self.spectators) == 1:
             print(f"✓ Spectator joined from {address}")
 
+    def send_to_all(self, message: Message) -> int:
+        """
+        Send a message to the joiner and relay it to every spectator.
+
+        Each recipient gets its own sequence number so ACKs can be tracked
+        per address.
+
+        Args:
+            message: Message to send
+
+        Returns:
+            Sequence number assigned for the joiner
+        """
+        seq_num = self.send_message(message)
+        self._broadcast_to_spectators(message)
+        return seq_num
+
     def _broadcast_to_spectators(self, message: Message):
         """
         Broadcast a message to all spectators.
@@ -925,6 +1064,12 @@ class HostPeer(BasePeer):
 
     def _handle_battle_setup(self, message: Message):
         """Handle opponent's battle setup."""
+        # The opponent may pick for a rematch before we have reset our own
+        # battle; keep the setup until start_battle applies it
+        if self.battle_state and self.battle_state.state == BattleState.GAME_OVER:
+            self._early_battle_setup = message
+            return
+        
         # Only process if we're still in SETUP state (ignore duplicates/retransmissions)
         if not self.battle_state or self.battle_state.state != BattleState.SETUP:
             return
@@ -968,9 +1113,7 @@ class HostPeer(BasePeer):
         # Send defense announce
         from messages import DefenseAnnounce
         defense = DefenseAnnounce(self.reliability.get_next_sequence_number())
-        self.send_message(defense)
-        # Broadcast DefenseAnnounce to spectators
-        self._broadcast_to_spectators(defense)
+        self.send_to_all(defense)
         
         # Advance to processing and calculate
         self.battle_state.advance_to_processing(move, self.battle_state.opponent_pokemon.pokemon.name)
@@ -995,9 +1138,7 @@ class HostPeer(BasePeer):
             loser = self.battle_state.opponent_pokemon.pokemon.name if winner == self.battle_state.my_pokemon.pokemon.name else self.battle_state.my_pokemon.pokemon.name
             from messages import GameOver
             game_over_msg = GameOver(winner, loser, self.reliability.get_next_sequence_number())
-            self.send_message(game_over_msg)
-            # Broadcast to spectators
-            self._broadcast_to_spectators(game_over_msg)
+            self.send_to_all(game_over_msg)
         
         # Send calculation report
         from messages import CalculationReport
@@ -1010,9 +1151,7 @@ class HostPeer(BasePeer):
             outcome["status_message"],
             self.reliability.get_next_sequence_number()
         )
-        self.send_message(report)
-        # Broadcast to spectators
-        self._broadcast_to_spectators(report)
+        self.send_to_all(report)
     
     def start_battle(self, pokemon_name: str, special_attack_uses: int = 5,
                     special_defense_uses: int = 5):
@@ -1039,6 +1178,9 @@ class HostPeer(BasePeer):
             self.battle_state.reset_for_new_battle()
             self.battle_state.set_pokemon(pokemon, special_attack_uses, special_defense_uses)
             battle_pokemon = self.battle_state.my_pokemon
+            early_setup, self._early_battle_setup = self._early_battle_setup, None
+            if early_setup:
+                self._handle_battle_setup(early_setup)
         else:
             battle_pokemon = BattlePokemon(pokemon, special_attack_uses, special_defense_uses)
         
@@ -1095,9 +1237,7 @@ class HostPeer(BasePeer):
                 loser = self.battle_state.opponent_pokemon.pokemon.name if winner == self.battle_state.my_pokemon.pokemon.name else self.battle_state.my_pokemon.pokemon.name
                 from messages import GameOver
                 game_over_msg = GameOver(winner, loser, self.reliability.get_next_sequence_number())
-                self.send_message(game_over_msg)
-                # Broadcast to spectators
-                self._broadcast_to_spectators(game_over_msg)
+                self.send_to_all(game_over_msg)
             
             # Send calculation report
             from messages import CalculationReport
@@ -1110,9 +1250,7 @@ class HostPeer(BasePeer):
                 outcome["status_message"],
                 self.reliability.get_next_sequence_number()
             )
-            self.send_message(report)
-            # Broadcast to spectators
-            self._broadcast_to_spectators(report)
+            self.send_to_all(report)
     
     def _handle_calculation_report(self, message: Message):
         """Handle opponent's calculation report."""
@@ -1211,6 +1349,7 @@ class HostPeer(BasePeer):
         
         # Store opponent's rematch decision
         self.opponent_wants_rematch = message.wants_rematch
+        self.rematch_event.set()
         if message.wants_rematch:
             print(f"\nOpponent wants a rematch!")
         else:
@@ -1246,8 +1385,8 @@ class HostPeer(BasePeer):
         self.battle_state.advance_to_processing(move, self.battle_state.my_pokemon.pokemon.name)
         
         # Wait for defense announce
-        timeout = time.time() + 5.0
-        while time.time() < timeout:
+        timeout = time.monotonic() + 5.0
+        while time.monotonic() < timeout:
             result = self.receive_message(timeout=0.5)
             if result:
                 msg, addr = result
@@ -1284,8 +1423,8 @@ class HostPeer(BasePeer):
             self.send_message(report)
             
             # Wait for confirmation or resolution
-            timeout = time.time() + 5.0
-            while time.time() < timeout:
+            timeout = time.monotonic() + 5.0
+            while time.monotonic() < timeout:
                 result = self.receive_message(timeout=0.5)
                 if result:
                     msg, addr = result
@@ -1335,8 +1474,8 @@ class JoinerPeer(BasePeer):
         self.send_message(request, self.peer_address)
         
         # Wait for response
-        timeout = time.time() + 5.0
-        while time.time() < timeout:
+        timeout = time.monotonic() + 5.0
+        while time.monotonic() < timeout:
             result = self.receive_message(timeout=0.5)
             if result:
                 msg, addr = result
@@ -1378,6 +1517,9 @@ class JoinerPeer(BasePeer):
             self.battle_state.reset_for_new_battle()
             self.battle_state.set_pokemon(pokemon, special_attack_uses, special_defense_uses)
             battle_pokemon = self.battle_state.my_pokemon
+            early_setup, self._early_battle_setup = self._early_battle_setup, None
+            if early_setup:
+                self._handle_battle_setup(early_setup)
         else:
             battle_pokemon = BattlePokemon(pokemon, special_attack_uses, special_defense_uses)
         
@@ -1418,6 +1560,12 @@ class JoinerPeer(BasePeer):
     
     def _handle_battle_setup(self, message: Message):
         """Handle opponent's battle setup."""
+        # The opponent may pick for a rematch before we have reset our own
+        # battle; keep the setup until start_battle applies it
+        if self.battle_state and self.battle_state.state == BattleState.GAME_OVER:
+            self._early_battle_setup = message
+            return
+        
         # Only process if we're still in SETUP state (ignore duplicates/retransmissions)
         if not self.battle_state or self.battle_state.state != BattleState.SETUP:
             return
@@ -1638,6 +1786,7 @@ class JoinerPeer(BasePeer):
         """Handle rematch request from opponent."""
         # Store opponent's rematch decision
         self.opponent_wants_rematch = message.wants_rematch
+        self.rematch_event.set()
         if message.wants_rematch:
             print(f"\nOpponent wants a rematch!")
         else:
@@ -1673,8 +1822,8 @@ class JoinerPeer(BasePeer):
         self.battle_state.advance_to_processing(move, self.battle_state.my_pokemon.pokemon.name)
         
         # Wait for defense announce
-        timeout = time.time() + 5.0
-        while time.time() < timeout:
+        timeout = time.monotonic() + 5.0
+        while time.monotonic() < timeout:
             result = self.receive_message(timeout=0.5)
             if result:
                 msg, addr = result
@@ -1711,8 +1860,8 @@ class JoinerPeer(BasePeer):
             self.send_message(report)
             
             # Wait for confirmation or resolution
-            timeout = time.time() + 5.0
-            while time.time() < timeout:
+            timeout = time.monotonic() + 5.0
+            while time.monotonic() < timeout:
                 result = self.receive_message(timeout=0.5)
                 if result:
                     msg, addr = result
@@ -1751,7 +1900,18 @@ class SpectatorPeer(BasePeer):
         self.game_over: bool = False
         self.winner: Optional[str] = None
         self.loser: Optional[str] = None
-        self.rematch_decisions: Dict[str, Optional[bool]] = {"host": None, "joiner": None}
+        self.host_rematch: Optional[bool] = None
+        self.joiner_rematch: Optional[bool] = None
+
+    def reset_for_rematch(self):
+        """Clear the tracked result, rematch decisions and HP before a rematch starts."""
+        self.game_over = False
+        self.winner = None
+        self.loser = None
+        self.host_rematch = None
+        self.joiner_rematch = None
+        self.host_hp = None
+        self.joiner_hp = None
 
     def connect(self, host_address: str, host_port: int):
         """
@@ -1772,8 +1932,8 @@ class SpectatorPeer(BasePeer):
         self.send_message(request, self.peer_address)
 
         # Wait for response
-        timeout = time.time() + 10.0  # Increased timeout to 10 seconds
-        while time.time() < timeout:
+        timeout = time.monotonic() + 10.0  # Increased timeout to 10 seconds
+        while time.monotonic() < timeout:
             result = self.receive_message(timeout=0.5)
             if result:
                 msg, addr = result
@@ -1872,9 +2032,9 @@ class SpectatorPeer(BasePeer):
         elif message.message_type == MessageType.REMATCH_REQUEST:
             # Track rematch decisions
             if is_from_host:
-                self.rematch_decisions["host"] = message.wants_rematch
+                self.host_rematch = message.wants_rematch
             else:
-                self.rematch_decisions["joiner"] = message.wants_rematch
+                self.joiner_rematch = message.wants_rematch
 
     def _format_battle_update(self, message: Message) -> Optional[str]:
         """
@@ -1938,7 +2098,7 @@ class SpectatorPeer(BasePeer):
             return f"\n{'='*60}\n  BATTLE ENDED!\n{'='*60}\n  Winner: {winner_pokemon}\n  Loser: {loser_pokemon}\n{'='*60}\n"
         elif message.message_type == MessageType.REMATCH_REQUEST:
             wants_rematch = message.wants_rematch
-            player = "Host" if self.rematch_decisions["host"] is None else "Joiner"
+            player = "Host" if self.host_rematch is None else "Joiner"
             decision = "wants" if wants_rematch else "does NOT want"
             return f"\n  {player} {decision} a rematch..."
         return None
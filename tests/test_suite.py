@@ -7,6 +7,9 @@ These tests can be run on a single machine without network setup.
 
 import unittest
 import sys
+import io
+import socket
+from contextlib import redirect_stdout
 from pathlib import Path
 
 # Add src directory to path
@@ -14,7 +17,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
 
 from game_data import PokemonDataLoader, MoveDatabase, Move
 from messages import Message, MessageType
-from peer import ReliabilityLayer
+from peer import ReliabilityLayer, BasePeer
 from battle import BattleStateMachine, BattleState, BattlePokemon, DamageCalculator
 
 
@@ -71,12 +74,22 @@ class TestMoveDatabase(unittest.TestCase):
         self.assertEqual(thunderbolt.power, 90)
         self.assertEqual(thunderbolt.damage_category, "special")
     
+    def test_all_moves(self):
+        """Test listing every move."""
+        all_moves = self.move_db.get_all_moves()
+        self.assertEqual(len(all_moves), len(self.move_db.get_all_move_names()))
+        self.assertIn(self.move_db.get_move("Thunderbolt"), all_moves)
+    
     def test_moves_by_type(self):
         """Test filtering moves by type."""
         electric_moves = self.move_db.get_moves_by_type("electric")
         self.assertGreater(len(electric_moves), 0)
         for move in electric_moves:
             self.assertEqual(move.move_type, "electric")
+        
+        # Lookup is case-insensitive and unknown types yield an empty list
+        self.assertEqual(self.move_db.get_moves_by_type("Electric"), electric_moves)
+        self.assertEqual(self.move_db.get_moves_by_type("shadow"), [])
 
 
 class TestMessageSerialization(unittest.TestCase):
@@ -157,6 +170,73 @@ class TestReliabilityLayer(unittest.TestCase):
         self.reliability.receive_ack(seq)
         self.assertFalse(self.reliability.has_pending_messages())
     
+    def test_next_timer(self):
+        """Test retransmission timer reporting."""
+        from messages import AttackAnnounce
+        
+        # Nothing pending means no timer
+        self.assertIsNone(self.reliability.next_timer_in())
+        
+        seq = self.reliability.send_message(AttackAnnounce("Thunderbolt", 0))
+        remaining = self.reliability.next_timer_in()
+        self.assertIsNotNone(remaining)
+        self.assertLessEqual(remaining, self.reliability.timeout)
+        
+        self.reliability.receive_ack(seq)
+        self.assertIsNone(self.reliability.next_timer_in())
+    
+    def test_next_timer_concurrent_sends(self):
+        """Test that timer reporting tolerates sends from another thread."""
+        import threading
+        from messages import AttackAnnounce
+        
+        stop = threading.Event()
+        
+        def churn():
+            # Mimics the chat thread adding and acknowledging messages
+            while not stop.is_set():
+                seqs = [self.reliability.send_message(AttackAnnounce("Thunderbolt", 0))
+                        for _ in range(50)]
+                for seq in seqs:
+                    self.reliability.receive_ack(seq)
+        
+        sender = threading.Thread(target=churn, daemon=True)
+        sender.start()
+        results = []
+        errors = []
+        try:
+            for _ in range(2000):
+                try:
+                    results.append(self.reliability.next_timer_in())
+                except Exception as e:
+                    errors.append(e)
+        finally:
+            stop.set()
+            sender.join()
+        
+        self.assertEqual(errors, [])
+        for result in results:
+            if result is not None:
+                self.assertGreaterEqual(result, 0.0)
+                self.assertLessEqual(result, self.reliability.timeout)
+    
+    def test_is_due(self):
+        """Test that idle reliability processing can be skipped."""
+        from messages import AttackAnnounce
+        
+        # A sweep has just run, and nothing is pending
+        self.reliability.cleanup_old_acks()
+        self.assertFalse(self.reliability.is_due())
+        
+        # A timed-out pending message makes processing due
+        seq = self.reliability.send_message(AttackAnnounce("Thunderbolt", 0))
+        self.reliability.pending_messages[seq].timestamp -= self.reliability.timeout
+        self.assertTrue(self.reliability.is_due())
+        
+        # A caller-supplied retransmission time is used instead of rescanning
+        self.assertFalse(self.reliability.is_due(float('inf')))
+        self.assertTrue(self.reliability.is_due(0.0))
+    
     def test_duplicate_detection(self):
         """Test duplicate message detection."""
         seq = 42
@@ -166,6 +246,135 @@ class TestReliabilityLayer(unittest.TestCase):
         self.assertTrue(self.reliability.is_duplicate(seq))
 
 
+class TestPeerSockets(unittest.TestCase):
+    """Test the peer's send and receive paths over localhost sockets."""
+    
+    def setUp(self):
+        """Set up a listening peer and a plain socket on the other end."""
+        self.peer = BasePeer(port=0)
+        with redirect_stdout(io.StringIO()):
+            self.peer.start_listening()
+        self.peer_address = ('127.0.0.1', self.peer.socket.getsockname()[1])
+        
+        self.remote = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.remote.bind(('127.0.0.1', 0))
+        self.remote.settimeout(1.0)
+        self.remote_address = self.remote.getsockname()
+    
+    def tearDown(self):
+        """Close both sockets."""
+        self.peer.disconnect()
+        self.remote.close()
+    
+    def test_retransmission_keeps_original_sequence(self):
+        """Test that a retransmission resends the bytes of the original send."""
+        from messages import AttackAnnounce
+        
+        announce = AttackAnnounce("Thunderbolt", 0)
+        seq = self.peer.send_message(announce, self.remote_address)
+        first, _ = self.remote.recvfrom(4096)
+        self.assertEqual(Message.deserialize(first).sequence_number, seq)
+        
+        # Re-sending the same object elsewhere (as spectator broadcasts do)
+        # gives it a new sequence number
+        self.peer.send_message(announce, ('127.0.0.1', 9))
+        self.assertNotEqual(announce.sequence_number, seq)
+        
+        self.peer.reliability.pending_messages[seq].timestamp -= self.peer.reliability.timeout
+        self.peer.process_reliability()
+        
+        resent, _ = self.remote.recvfrom(4096)
+        self.assertEqual(resent, first)
+        self.assertEqual(Message.deserialize(resent).sequence_number, seq)
+        # The live message object, still pending under its newer number, is untouched
+        self.assertNotEqual(announce.sequence_number, seq)
+    
+    def test_receive_pending(self):
+        """Test draining queued datagrams without blocking."""
+        import select
+        from messages import AttackAnnounce
+        
+        # Nothing queued: the non-blocking read stops straight away
+        self.assertEqual(self.peer.receive_pending(), [])
+        
+        for seq in (1, 2, 3):
+            self.remote.sendto(AttackAnnounce("Thunderbolt", seq).serialize(), self.peer_address)
+        select.select([self.peer.socket], [], [], 1.0)
+        
+        # The cap leaves the rest queued for the next call
+        first = self.peer.receive_pending(max_messages=2)
+        self.assertEqual([m.sequence_number for m, _ in first], [1, 2])
+        self.assertEqual(first[0][1], self.remote_address)
+        
+        rest = self.peer.receive_pending()
+        self.assertEqual([m.sequence_number for m, _ in rest], [3])
+        self.assertEqual(self.peer.receive_pending(), [])
+    
+    def test_receive_pending_skips_port_unreachable(self):
+        """Test that a Windows ICMP port-unreachable error does not end the drain."""
+        from messages import AttackAnnounce
+        
+        data = AttackAnnounce("Thunderbolt", 7).serialize()
+        
+        class FakeSocket:
+            def __init__(self):
+                self.results = [OSError(10054, "connection reset"),
+                                (data, ('127.0.0.1', 9)),
+                                BlockingIOError()]
+            
+            def recvfrom(self, size):
+                result = self.results.pop(0)
+                if isinstance(result, Exception):
+                    raise result
+                return result
+        
+        real_socket = self.peer.socket
+        self.peer.socket = FakeSocket()
+        try:
+            messages = self.peer.receive_pending()
+        finally:
+            self.peer.socket = real_socket
+        
+        self.assertEqual([m.sequence_number for m, _ in messages], [7])
+
+    def test_rematch_setup_before_start_battle(self):
+        """Test that a rematch BattleSetup arriving during GAME_OVER is kept."""
+        import select
+        from peer import JoinerPeer
+        from messages import RematchRequest, BattleSetup
+
+        joiner = JoinerPeer(port=0)
+        with redirect_stdout(io.StringIO()):
+            joiner.start_listening()
+        self.addCleanup(joiner.disconnect)
+        joiner.peer_address = self.remote_address
+        joiner.battle_state = BattleStateMachine(is_host=False)
+        joiner.battle_state.state = BattleState.GAME_OVER
+        joiner.connected = True
+        joiner_address = ('127.0.0.1', joiner.socket.getsockname()[1])
+
+        # The opponent accepts and picks straight away, back to back
+        boosts = {"special_attack_uses": 5, "special_defense_uses": 5}
+        self.remote.sendto(RematchRequest(True, 1).serialize(), joiner_address)
+        self.remote.sendto(BattleSetup("P2P", "Charizard", boosts, 2).serialize(), joiner_address)
+        select.select([joiner.socket], [], [], 1.0)
+
+        with redirect_stdout(io.StringIO()):
+            received = []
+            while len(received) < 2 and select.select([joiner.socket], [], [], 1.0)[0]:
+                received.extend(joiner.receive_pending())
+            for message, address in received:
+                joiner.handle_message(message, address)
+            self.assertTrue(joiner.rematch_event.is_set())
+            self.assertIsNone(joiner.battle_state.opponent_pokemon)
+
+            joiner.start_battle("Pikachu")
+
+        self.assertEqual(joiner.battle_state.state, BattleState.WAITING_FOR_MOVE)
+        self.assertEqual(joiner.battle_state.opponent_pokemon.pokemon.name, "Charizard")
+        self.assertEqual(joiner.battle_state.my_pokemon.pokemon.name, "Pikachu")
+
+
 class TestBattleState(unittest.TestCase):
     """Test battle state machine."""
     
@@ -196,6 +405,17 @@ class TestBattleState(unittest.TestCase):
         self.battle_state.advance_to_complete()
         self.assertEqual(self.battle_state.state, BattleState.WAITING_FOR_MOVE)
     
+    def test_restore_hp(self):
+        """Test restoring a damaged Pokémon for a rematch."""
+        pikachu = self.pokemon_loader.get_pokemon("Pikachu")
+        self.battle_state.set_pokemon(pikachu)
+        battle_pokemon = self.battle_state.my_pokemon
+        battle_pokemon.take_damage(10)
+        self.assertLess(battle_pokemon.current_hp, battle_pokemon.max_hp)
+        
+        battle_pokemon.restore_hp()
+        self.assertEqual(battle_pokemon.current_hp, battle_pokemon.max_hp)
+    
     def test_turn_order(self):
         """Test turn order management."""
         self.battle_state = BattleStateMachine(is_host=True)
@@ -343,6 +563,7 @@ def run_tests():
     suite.addTests(loader.loadTestsFromTestCase(TestMoveDatabase))
     suite.addTests(loader.loadTestsFromTestCase(TestMessageSerialization))
     suite.addTests(loader.loadTestsFromTestCase(TestReliabilityLayer))
+    suite.addTests(loader.loadTestsFromTestCase(TestPeerSockets))
     suite.addTests(loader.loadTestsFromTestCase(TestBattleState))
     suite.addTests(loader.loadTestsFromTestCase(TestDamageCalculator))
     suite.addTests(loader.loadTestsFromTestCase(TestIntegration))